@@ -2,24 +2,133 @@
 BlackFang Intelligence - Authentication API Endpoints
 """
 
+import asyncio
+import base64
+import hmac
+import json
 import logging
+import os
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any
-from fastapi import APIRouter, HTTPException, status, Depends, Request
+from types import MappingProxyType
+from typing import Dict, Any, Tuple
+from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.responses import ORJSONResponse
 from fastapi.security import HTTPAuthorizationCredentials
 
 from models import (
     UserLogin, Token, RefreshToken, CompanyCreate, CompanyResponse, 
-    APIResponse, TokenData
+    APIResponse, TokenData, ChangePasswordRequest
 )
-from auth import auth_manager, session_manager, security, validate_password_strength
+from auth import auth_manager, invalidate_verified_token, session_manager, security, validate_password_strength
 from database import get_company_by_email, db_pool
 from config import settings
 
 # Configure router
-auth_router = APIRouter()
+auth_router = APIRouter(default_response_class=ORJSONResponse)
 logger = logging.getLogger(__name__)
 
+# Password hashing is CPU-bound; hashlib releases the GIL so threads scale across cores
+_HASH_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Verified against when the email is unknown so failed logins take the same time
+_DUMMY_HASH = auth_manager.hash_password(secrets.token_urlsafe(32))
+
+# Monthly pricing by subscription plan
+_MONTHLY_FEE_MAP = MappingProxyType({
+    "basic": settings.BASIC_PLAN_PRICE,
+    "professional": settings.PROFESSIONAL_PLAN_PRICE,
+    "enterprise": settings.ENTERPRISE_PLAN_PRICE
+})
+_DEFAULT_FEE = 45000
+
+# Access token lifetime in seconds, as reported to clients
+_EXPIRES_IN = auth_manager.access_token_expire_minutes * 60
+
+# Demo account data is fixed, so build it once
+_DEMO_EMAIL = settings.DEMO_EMAIL
+_DEMO_EMAIL_BYTES = _DEMO_EMAIL.encode('utf-8')
+_DEMO_PASSWORD = settings.DEMO_PASSWORD.encode('utf-8')
+_DEMO_TOKEN_DATA = {
+    "company_id": 1,
+    "email": _DEMO_EMAIL,
+    "subscription_plan": "professional"
+}
+_DEMO_USER = {
+    "id": 1,
+    "name": "Demo Automotive Dealership",
+    "email": _DEMO_EMAIL,
+    "company_name": "Demo Motors Pvt Ltd",
+    "subscription_plan": "professional",
+    "monthly_fee": 45000
+}
+_DEMO_PROFILE = {
+    **_DEMO_USER,
+    "industry": "Automotive",
+    "is_active": True
+}
+
+# Hot queries, kept prepared on each pooled connection
+_LOGIN_QUERY = """
+    SELECT id, name, email, password_hash, company_name,
+           industry, subscription_plan, monthly_fee
+    FROM companies WHERE email = $1 AND is_active = TRUE
+"""
+_TOUCH_LOGIN_QUERY = "UPDATE companies SET updated_at = CURRENT_TIMESTAMP WHERE id = $1 RETURNING id"
+_REGISTER_QUERY = """
+    INSERT INTO companies (
+        name, email, password_hash, company_name, 
+        industry, subscription_plan, monthly_fee
+    ) VALUES ($1, $2, $3, $4, $5, $6, $7)
+    ON CONFLICT (email) DO NOTHING
+    RETURNING id
+"""
+_CURRENT_USER_QUERY = """
+    SELECT id, name, email, company_name, industry,
+           subscription_plan, monthly_fee, is_active, created_at
+    FROM companies WHERE id = $1 AND is_active = TRUE
+"""
+_PASSWORD_HASH_QUERY = "SELECT password_hash FROM companies WHERE id = $1 AND is_active = TRUE"
+_UPDATE_PASSWORD_QUERY = """
+    UPDATE companies 
+    SET password_hash = $1, updated_at = CURRENT_TIMESTAMP
+    WHERE id = $2
+    RETURNING id
+"""
+
+def _is_well_formed_token(token: str) -> bool:
+    """
+    Cheap structural check run before signature verification
+    
+    Args:
+        token: JWT token string
+        
+    Returns:
+        True if token has three segments and a header using our algorithm
+    """
+    parts = token.split('.')
+    if len(parts) != 3 or not all(parts):
+        return False
+    
+    header_b64 = parts[0]
+    try:
+        header = json.loads(base64.urlsafe_b64decode(header_b64 + '=' * (-len(header_b64) % 4)))
+    except ValueError:
+        return False
+    
+    return isinstance(header, dict) and header.get("alg") == settings.JWT_ALGORITHM
+
+# Recently fetched /me profiles: company_id -> (cache expiry, profile)
+_USER_CACHE: Dict[int, Tuple[float, CompanyResponse]] = {}
+_USER_CACHE_MAX_SIZE = 10_000
+_USER_CACHE_TTL = 30  # seconds
+
+def invalidate_user_cache(company_id: int) -> None:
+    """Drop cached profile for a company (called on companies_changed notifications)"""
+    _USER_CACHE.pop(company_id, None)
+
 @auth_router.post("/login", response_model=Dict[str, Any])
 async def login_user(login_data: UserLogin):
     """
@@ -32,20 +141,17 @@ async def login_user(login_data: UserLogin):
         Authentication tokens and user information
     """
     try:
-        email = login_data.email.lower().strip()
+        email = login_data.email
         password = login_data.password
         
         # Demo authentication for development/testing
-        if email == settings.DEMO_EMAIL and password == settings.DEMO_PASSWORD:
+        # Both checks always run, in constant time
+        is_demo_email = hmac.compare_digest(email.encode('utf-8'), _DEMO_EMAIL_BYTES)
+        is_demo_password = hmac.compare_digest(password.encode('utf-8'), _DEMO_PASSWORD)
+        if is_demo_email and is_demo_password:
             # Create demo user tokens
-            token_data = {
-                "company_id": 1,
-                "email": email,
-                "subscription_plan": "professional"
-            }
-            
-            access_token = auth_manager.create_access_token(token_data)
-            refresh_token = auth_manager.create_refresh_token(token_data)
+            access_token = auth_manager.create_access_token(_DEMO_TOKEN_DATA)
+            refresh_token = auth_manager.create_refresh_token(_DEMO_TOKEN_DATA)
             
             # Create session
             await session_manager.create_session(1, refresh_token)
@@ -55,66 +161,66 @@ async def login_user(login_data: UserLogin):
                 "access_token": access_token,
                 "refresh_token": refresh_token,
                 "token_type": "bearer",
-                "expires_in": auth_manager.access_token_expire_minutes * 60,
-                "user": {
-                    "id": 1,
-                    "name": "Demo Automotive Dealership",
-                    "email": email,
-                    "company_name": "Demo Motors Pvt Ltd",
-                    "subscription_plan": "professional",
-                    "monthly_fee": 45000
-                }
+                "expires_in": _EXPIRES_IN,
+                "user": _DEMO_USER
             }
         
         # Database authentication
         if db_pool:
             async with db_pool.acquire() as conn:
-                user = await conn.fetchrow(
-                    "SELECT * FROM companies WHERE email = $1 AND is_active = TRUE",
-                    email
-                )
+                statement = await conn.prepared(_LOGIN_QUERY)
+                user = await statement.fetchrow(email)
+            
+            # Verify password after releasing the connection back to the pool.
+            # Unknown emails are checked against a dummy hash so timing doesn't
+            # reveal whether an account exists.
+            password_valid = await asyncio.get_running_loop().run_in_executor(
+                _HASH_POOL,
+                auth_manager.verify_password,
+                password,
+                user['password_hash'] if user else _DUMMY_HASH
+            )
+            
+            if user and password_valid:
+                # Create authentication tokens
+                token_data = {
+                    "company_id": user['id'],
+                    "email": user['email'],
+                    "subscription_plan": user['subscription_plan']
+                }
+                
+                access_token = auth_manager.create_access_token(token_data)
+                refresh_token = auth_manager.create_refresh_token(token_data)
+                
+                # Create session
+                await session_manager.create_session(user['id'], refresh_token)
                 
-                if user and auth_manager.verify_password(password, user['password_hash']):
-                    # Create authentication tokens
-                    token_data = {
-                        "company_id": user['id'],
+                # Update last login timestamp
+                async with db_pool.acquire() as conn:
+                    statement = await conn.prepared(_TOUCH_LOGIN_QUERY)
+                    await statement.fetchval(user['id'])
+                
+                logger.info("User %s authenticated successfully", email)
+                
+                return {
+                    "success": True,
+                    "access_token": access_token,
+                    "refresh_token": refresh_token,
+                    "token_type": "bearer",
+                    "expires_in": _EXPIRES_IN,
+                    "user": {
+                        "id": user['id'],
+                        "name": user['name'],
                         "email": user['email'],
-                        "subscription_plan": user['subscription_plan']
-                    }
-                    
-                    access_token = auth_manager.create_access_token(token_data)
-                    refresh_token = auth_manager.create_refresh_token(token_data)
-                    
-                    # Create session
-                    await session_manager.create_session(user['id'], refresh_token)
-                    
-                    # Update last login timestamp
-                    await conn.execute(
-                        "UPDATE companies SET updated_at = CURRENT_TIMESTAMP WHERE id = $1",
-                        user['id']
-                    )
-                    
-                    logger.info(f"User {email} authenticated successfully")
-                    
-                    return {
-                        "success": True,
-                        "access_token": access_token,
-                        "refresh_token": refresh_token,
-                        "token_type": "bearer",
-                        "expires_in": auth_manager.access_token_expire_minutes * 60,
-                        "user": {
-                            "id": user['id'],
-                            "name": user['name'],
-                            "email": user['email'],
-                            "company_name": user['company_name'],
-                            "subscription_plan": user['subscription_plan'],
-                            "monthly_fee": user['monthly_fee'],
-                            "industry": user['industry']
-                        }
+                        "company_name": user['company_name'],
+                        "subscription_plan": user['subscription_plan'],
+                        "monthly_fee": user['monthly_fee'],
+                        "industry": user['industry']
                     }
+                }
         
         # Authentication failed
-        logger.warning(f"Failed authentication attempt for {email}")
+        logger.warning("Failed authentication attempt for %s", email)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -164,7 +270,7 @@ async def refresh_access_token(refresh_data: RefreshToken):
         return {
             "access_token": new_access_token,
             "token_type": "bearer",
-            "expires_in": auth_manager.access_token_expire_minutes * 60
+            "expires_in": _EXPIRES_IN
         }
         
     except HTTPException:
@@ -205,40 +311,20 @@ async def register_company(company_data: CompanyCreate):
                 detail="Registration service temporarily unavailable"
             )
         
-        email = company_data.email.lower().strip()
+        email = company_data.email
+        
+        # Hash password before taking a pooled connection
+        password_hash = await asyncio.get_running_loop().run_in_executor(
+            _HASH_POOL, auth_manager.hash_password, company_data.password
+        )
+        
+        # Determine pricing based on subscription plan
+        monthly_fee = _MONTHLY_FEE_MAP.get(company_data.subscription_plan, _DEFAULT_FEE)
         
         async with db_pool.acquire() as conn:
-            # Check if email already exists
-            existing_user = await conn.fetchrow(
-                "SELECT id FROM companies WHERE email = $1",
-                email
-            )
-            
-            if existing_user:
-                raise HTTPException(
-                    status_code=status.HTTP_409_CONFLICT,
-                    detail="Email address already registered"
-                )
-            
-            # Hash password
-            password_hash = auth_manager.hash_password(company_data.password)
-            
-            # Determine pricing based on subscription plan
-            monthly_fee_map = {
-                "basic": settings.BASIC_PLAN_PRICE,
-                "professional": settings.PROFESSIONAL_PLAN_PRICE,
-                "enterprise": settings.ENTERPRISE_PLAN_PRICE
-            }
-            monthly_fee = monthly_fee_map.get(company_data.subscription_plan, 45000)
-            
-            # Create company record
-            company_id = await conn.fetchval("""
-                INSERT INTO companies (
-                    name, email, password_hash, company_name, 
-                    industry, subscription_plan, monthly_fee
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7)
-                RETURNING id
-            """,
+            # Create company record; no row comes back if the email is taken
+            statement = await conn.prepared(_REGISTER_QUERY)
+            company_id = await statement.fetchval(
                 company_data.name,
                 email,
                 password_hash,
@@ -248,7 +334,13 @@ async def register_company(company_data: CompanyCreate):
                 monthly_fee
             )
             
-            logger.info(f"New company registered: {email} (ID: {company_id})")
+            if company_id is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Email address already registered"
+                )
+            
+            logger.info("New company registered: %s (ID: %s)", email, company_id)
             
             return {
                 "success": True,
@@ -289,8 +381,9 @@ async def logout_user(
         
         # Revoke all sessions for this user
         await session_manager.revoke_all_sessions(company_id)
+        invalidate_verified_token(credentials.credentials)
         
-        logger.info(f"User {company_id} logged out successfully")
+        logger.info("User %s logged out successfully", company_id)
         
         return {
             "success": True,
@@ -324,29 +417,27 @@ async def get_current_user_info(
         company_id = payload.get("company_id")
         
         # Demo user response
-        if company_id == 1 and payload.get("email") == settings.DEMO_EMAIL:
-            return {
-                "id": 1,
-                "name": "Demo Automotive Dealership",
-                "email": settings.DEMO_EMAIL,
-                "company_name": "Demo Motors Pvt Ltd",
-                "industry": "Automotive",
-                "subscription_plan": "professional",
-                "monthly_fee": 45000,
-                "is_active": True,
-                "created_at": datetime.utcnow()
-            }
+        if company_id == 1 and payload.get("email") == _DEMO_EMAIL:
+            return {**_DEMO_PROFILE, "created_at": datetime.utcnow()}
+        
+        now = time.monotonic()
+        cached = _USER_CACHE.get(company_id)
+        if cached and cached[0] > now:
+            return cached[1]
         
         # Database lookup for real users
         if db_pool:
             async with db_pool.acquire() as conn:
-                user = await conn.fetchrow(
-                    "SELECT * FROM companies WHERE id = $1 AND is_active = TRUE",
-                    company_id
-                )
-                
-                if user:
-                    return dict(user)
+                statement = await conn.prepared(_CURRENT_USER_QUERY)
+                user = await statement.fetchrow(company_id)
+            
+            if user:
+                # Records have no attribute access, so build from the mapping protocol
+                profile = CompanyResponse(**user)
+                if len(_USER_CACHE) >= _USER_CACHE_MAX_SIZE:
+                    _USER_CACHE.pop(next(iter(_USER_CACHE)))
+                _USER_CACHE[company_id] = (now + _USER_CACHE_TTL, profile)
+                return profile
         
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -364,24 +455,22 @@ async def get_current_user_info(
 
 @auth_router.post("/change-password", response_model=APIResponse)
 async def change_password(
-    request: Request,
+    password_data: ChangePasswordRequest,
     credentials: HTTPAuthorizationCredentials = Depends(security)
 ):
     """
     Change user password
     
     Args:
-        request: HTTP request containing old and new passwords
+        password_data: Old and new passwords
         credentials: JWT credentials
         
     Returns:
         Password change confirmation
     """
     try:
-        # Get request data
-        data = await request.json()
-        old_password = data.get("old_password")
-        new_password = data.get("new_password")
+        old_password = password_data.old_password
+        new_password = password_data.new_password
         
         if not old_password or not new_password:
             raise HTTPException(
@@ -412,43 +501,47 @@ async def change_password(
         
         async with db_pool.acquire() as conn:
             # Get current user data
-            user = await conn.fetchrow(
-                "SELECT password_hash FROM companies WHERE id = $1 AND is_active = TRUE",
-                company_id
+            statement = await conn.prepared(_PASSWORD_HASH_QUERY)
+            user = await statement.fetchrow(company_id)
+        
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="User not found"
             )
-            
-            if not user:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail="User not found"
-                )
-            
-            # Verify old password
-            if not auth_manager.verify_password(old_password, user['password_hash']):
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail="Current password is incorrect"
-                )
-            
-            # Hash new password
-            new_password_hash = auth_manager.hash_password(new_password)
-            
-            # Update password
-            await conn.execute("""
-                UPDATE companies 
-                SET password_hash = $1, updated_at = CURRENT_TIMESTAMP
-                WHERE id = $2
-            """, new_password_hash, company_id)
-            
-            # Revoke all sessions to force re-login
-            await session_manager.revoke_all_sessions(company_id)
-            
-            logger.info(f"Password changed for user {company_id}")
-            
-            return {
-                "success": True,
-                "message": "Password changed successfully. Please login again."
-            }
+        
+        # Hash work runs with no pooled connection held
+        loop = asyncio.get_running_loop()
+        
+        # Verify old password
+        if not await loop.run_in_executor(
+            _HASH_POOL, auth_manager.verify_password, old_password, user['password_hash']
+        ):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Current password is incorrect"
+            )
+        
+        # Hash new password
+        new_password_hash = await loop.run_in_executor(
+            _HASH_POOL, auth_manager.hash_password, new_password
+        )
+        
+        # Update password
+        async with db_pool.acquire() as conn:
+            statement = await conn.prepared(_UPDATE_PASSWORD_QUERY)
+            await statement.fetchval(new_password_hash, company_id)
+        
+        # Revoke all sessions to force re-login
+        await session_manager.revoke_all_sessions(company_id)
+        invalidate_verified_token(credentials.credentials)
+        
+        logger.info("Password changed for user %s", company_id)
+        
+        return {
+            "success": True,
+            "message": "Password changed successfully. Please login again."
+        }
             
     except HTTPException:
         raise
@@ -473,6 +566,12 @@ async def validate_token(
         Token validation result
     """
     try:
+        if not _is_well_formed_token(credentials.credentials):
+            return {
+                "valid": False,
+                "error": "Invalid token format"
+            }
+        
         payload = auth_manager.decode_token(credentials.credentials, "access")
         
         return {
@@ -1,92 +1,225 @@
 # Dashboard and Client Management API Endpoints
 
+# Column groups of the dashboard statistics row
+COMPETITOR_STAT_FIELDS = (
+    'total_competitors', 'active_competitors', 'high_threat', 'medium_threat', 'low_threat'
+)
+ALERT_SUMMARY_FIELDS = (
+    'total_alerts', 'critical_alerts', 'high_alerts', 'medium_alerts', 'low_alerts',
+    'unread_alerts', 'today_alerts', 'week_alerts'
+)
+PERFORMANCE_STAT_FIELDS = ('success_rate', 'total_scraping_jobs', 'today_jobs')
+
+# Statistics for a company with no competitors or alerts yet
+EMPTY_DASHBOARD_STATS = {
+    **dict.fromkeys(COMPETITOR_STAT_FIELDS + ALERT_SUMMARY_FIELDS + PERFORMANCE_STAT_FIELDS, 0),
+    'success_rate': None
+}
+
+# Dashboard responses are cached in Redis briefly; data changes on scrape-interval timescales
+DASHBOARD_CACHE_TTL = 30  # seconds
+
+# Hot read queries, kept as module constants so every request reuses the
+# same statement text and hits asyncpg's per-connection prepared statement cache
+DASHBOARD_COMPANY_QUERY = """
+    SELECT 
+        id, name, email, company_name, industry, phone, website, address,
+        subscription_plan, subscription_status, monthly_fee, billing_cycle,
+        trial_ends_at, last_login, created_at, updated_at, is_active
+    FROM companies
+    WHERE id = $1
+"""
+
+DASHBOARD_STATS_QUERY = """
+    SELECT 
+        s.*,
+        COALESCE(SUM(d.alerts) FILTER (WHERE d.day = CURRENT_DATE), 0) as today_alerts,
+        COALESCE(SUM(d.alerts) FILTER (WHERE d.day >= CURRENT_DATE - 7), 0) as week_alerts,
+        SUM(d.completed_jobs)::numeric / NULLIF(SUM(d.scraping_jobs), 0) as success_rate,
+        COALESCE(SUM(d.scraping_jobs), 0) as total_scraping_jobs,
+        COALESCE(SUM(d.scraping_jobs) FILTER (WHERE d.day = CURRENT_DATE), 0) as today_jobs
+    FROM company_dashboard_stats s
+    LEFT JOIN company_daily_activity d
+        ON d.company_id = s.company_id AND d.day >= CURRENT_DATE - 30
+    WHERE s.company_id = $1
+    GROUP BY s.company_id
+"""
+
+DASHBOARD_RECENT_ALERTS_QUERY = """
+    SELECT * FROM alerts
+    WHERE company_id = $1 
+    ORDER BY created_at DESC 
+    LIMIT 20
+"""
+
+# Active-competitor allowance per subscription plan (unknown plans get the basic limit).
+# competitor_id is NULL when nothing was inserted; within_limit tells a full plan from a duplicate.
+ADD_COMPETITOR_QUERY = """
+    WITH allowed AS (
+        -- Under the limit unless an active competitor exists at position limit;
+        -- the scan stops there instead of counting every row
+        SELECT NOT EXISTS (
+            SELECT 1 FROM competitors
+            WHERE company_id = $1 AND monitoring_status = 'active'
+            OFFSET CASE subscription_plan
+                WHEN 'basic' THEN 5
+                WHEN 'professional' THEN 15
+                WHEN 'enterprise' THEN 999999
+                ELSE 5
+            END - 1
+        ) as within_limit
+        FROM companies WHERE id = $1
+    ), inserted AS (
+        INSERT INTO competitors (
+            company_id, name, website, industry, location,
+            threat_level, priority, monitoring_status
+        )
+        SELECT $1, $2, $3, $4, $5, $6, $7::integer, $8
+        FROM allowed
+        WHERE allowed.within_limit
+        ON CONFLICT (company_id, lower(website)) DO NOTHING
+        RETURNING id
+    )
+    SELECT inserted.id as competitor_id, allowed.within_limit
+    FROM allowed LEFT JOIN inserted ON true
+"""
+
+COMPETITOR_NAMES_QUERY = "SELECT id, name FROM competitors WHERE id = ANY($1::int[])"
+
+DASHBOARD_RECENT_SCRAPING_QUERY = """
+    SELECT 
+        cd.scraped_at,
+        cd.processing_status,
+        c.name as competitor_name,
+        c.website,
+        c.threat_level
+    FROM competitor_data cd
+    JOIN competitors c ON cd.competitor_id = c.id
+    WHERE c.company_id = $1
+    ORDER BY cd.scraped_at DESC
+    LIMIT 10
+"""
+
+COMPETITORS_LIST_QUERY = """
+    SELECT 
+        c.*,
+        sd.scraping_count,
+        sd.last_scraped,
+        ad.alert_count,
+        ad.high_alerts,
+        COUNT(*) FILTER (WHERE c.monitoring_status = 'active') OVER () as active_count
+    FROM competitors c
+    LEFT JOIN LATERAL (
+        SELECT COUNT(*) as scraping_count, MAX(scraped_at) as last_scraped
+        FROM competitor_data
+        WHERE competitor_id = c.id
+    ) sd ON true
+    LEFT JOIN LATERAL (
+        SELECT 
+            COUNT(*) as alert_count,
+            COUNT(*) FILTER (WHERE severity IN ('HIGH', 'CRITICAL')) as high_alerts
+        FROM alerts
+        WHERE competitor_id = c.id
+    ) ad ON true
+    WHERE c.company_id = $1
+    ORDER BY c.priority ASC, c.threat_level DESC, c.created_at DESC
+"""
+
+def dashboard_cache_key(company_id: int, user_id: int) -> str:
+    """Cache key scoped to both the company and the requesting user"""
+    return f"dashboard:{company_id}:{user_id}"
+
+async def invalidate_dashboard_cache(company_id: int) -> None:
+    """Drop the cached dashboard for a company after its data changes"""
+    if redis_client:
+        try:
+            # Only the company's own user may read its dashboard
+            await redis_client.delete(dashboard_cache_key(company_id, company_id))
+        except Exception as e:
+            logger.warning(f"Dashboard cache invalidation failed: {str(e)}")
+
+async def pool_fetch(query: str, *args) -> list:
+    """Run a fetch on a connection of its own so callers can gather several"""
+    async with db_pool.acquire() as conn:
+        return await conn.fetch(query, *args)
+
+async def pool_fetchrow(query: str, *args):
+    """Run a fetchrow on a connection of its own so callers can gather several"""
+    async with db_pool.acquire() as conn:
+        return await conn.fetchrow(query, *args)
+
+async def fetch_recent_alerts(company_id: int) -> list:
+    """Latest alerts for the dashboard with their competitor names attached"""
+    async with db_pool.acquire() as conn:
+        recent_alerts = [dict(alert) for alert in await conn.fetch(DASHBOARD_RECENT_ALERTS_QUERY, company_id)]
+        
+        # Attach competitor names with one primary-key lookup for the distinct ids
+        competitor_ids = list({alert['competitor_id'] for alert in recent_alerts if alert['competitor_id'] is not None})
+        competitor_names = {}
+        if competitor_ids:
+            competitor_names = dict(await conn.fetch(COMPETITOR_NAMES_QUERY, competitor_ids))
+    
+    for alert in recent_alerts:
+        alert['competitor_name'] = competitor_names.get(alert['competitor_id'])
+    return recent_alerts
+
 @app.get("/api/dashboard/{company_id}")
 async def get_dashboard_data(
     company_id: int,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get comprehensive dashboard data"""
+    """
+    Get comprehensive dashboard data
+    
+    The response is cached for DASHBOARD_CACHE_TTL seconds. Adding a competitor
+    and marking an alert read invalidate it; changes made by the scraper and
+    alert pipeline (counted by the statistics triggers) show up once it expires.
+    """
     if current_user['id'] != company_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    async with db_pool.acquire() as conn:
-        # Get company info
-        company = await conn.fetchrow(
-            "SELECT * FROM companies WHERE id = $1", company_id
-        )
-        
-        # Get competitor count and status
-        competitors_stats = await conn.fetchrow("""
-            SELECT 
-                COUNT(*) as total_competitors,
-                COUNT(*) FILTER (WHERE monitoring_status = 'active') as active_competitors,
-                COUNT(*) FILTER (WHERE threat_level = 'HIGH') as high_threat,
-                COUNT(*) FILTER (WHERE threat_level = 'MEDIUM') as medium_threat,
-                COUNT(*) FILTER (WHERE threat_level = 'LOW') as low_threat
-            FROM competitors WHERE company_id = $1
-        """, company_id)
-        
-        # Get recent alerts
-        recent_alerts = await conn.fetch("""
-            SELECT a.*, c.name as competitor_name
-            FROM alerts a
-            LEFT JOIN competitors c ON a.competitor_id = c.id
-            WHERE a.company_id = $1 
-            ORDER BY a.created_at DESC 
-            LIMIT 20
-        """, company_id)
-        
-        # Get alert summary
-        alert_summary = await conn.fetchrow("""
-            SELECT 
-                COUNT(*) as total_alerts,
-                COUNT(*) FILTER (WHERE severity = 'CRITICAL') as critical_alerts,
-                COUNT(*) FILTER (WHERE severity = 'HIGH') as high_alerts,
-                COUNT(*) FILTER (WHERE severity = 'MEDIUM') as medium_alerts,
-                COUNT(*) FILTER (WHERE severity = 'LOW') as low_alerts,
-                COUNT(*) FILTER (WHERE is_read = FALSE) as unread_alerts,
-                COUNT(*) FILTER (WHERE created_at >= CURRENT_DATE) as today_alerts,
-                COUNT(*) FILTER (WHERE created_at >= CURRENT_DATE - INTERVAL '7 days') as week_alerts
-            FROM alerts WHERE company_id = $1
-        """, company_id)
-        
-        # Get recent scraping activity
-        recent_scraping = await conn.fetch("""
-            SELECT 
-                cd.scraped_at,
-                cd.processing_status,
-                c.name as competitor_name,
-                c.website,
-                c.threat_level
-            FROM competitor_data cd
-            JOIN competitors c ON cd.competitor_id = c.id
-            WHERE c.company_id = $1
-            ORDER BY cd.scraped_at DESC
-            LIMIT 10
-        """, company_id)
-        
-        # Get system performance metrics
-        performance_stats = await conn.fetchrow("""
-            SELECT 
-                AVG(CASE WHEN cd.processing_status = 'completed' THEN 1.0 ELSE 0.0 END) as success_rate,
-                COUNT(*) as total_scraping_jobs,
-                COUNT(*) FILTER (WHERE cd.scraped_at >= CURRENT_DATE) as today_jobs
-            FROM competitor_data cd
-            JOIN competitors c ON cd.competitor_id = c.id
-            WHERE c.company_id = $1 AND cd.scraped_at >= CURRENT_DATE - INTERVAL '30 days'
-        """, company_id)
-        
-        return {
-            "company": dict(company) if company else None,
-            "competitors": dict(competitors_stats) if competitors_stats else {},
-            "alerts": {
-                "recent": [dict(alert) for alert in recent_alerts],
-                "summary": dict(alert_summary) if alert_summary else {}
-            },
-            "scraping_activity": [dict(activity) for activity in recent_scraping],
-            "performance": dict(performance_stats) if performance_stats else {},
-            "last_updated": datetime.utcnow().isoformat()
-        }
+    cache_key = dashboard_cache_key(company_id, current_user['id'])
+    if redis_client:
+        try:
+            cached = await redis_client.get(cache_key)
+            if cached:
+                return Response(content=cached, media_type="application/json")
+        except Exception as e:
+            logger.warning(f"Dashboard cache read failed: {str(e)}")
+    
+    # Independent reads run concurrently, each on its own pooled connection
+    company, stats, recent_alerts, recent_scraping = await asyncio.gather(
+        pool_fetchrow(DASHBOARD_COMPANY_QUERY, company_id),
+        pool_fetchrow(DASHBOARD_STATS_QUERY, company_id),
+        fetch_recent_alerts(company_id),
+        pool_fetch(DASHBOARD_RECENT_SCRAPING_QUERY, company_id)
+    )
+    
+    # Companies without competitors or alerts have no statistics row yet
+    stats = stats or EMPTY_DASHBOARD_STATS
+    
+    dashboard = {
+        "company": company,
+        "competitors": {key: stats[key] for key in COMPETITOR_STAT_FIELDS},
+        "alerts": {
+            "recent": recent_alerts,
+            "summary": {key: stats[key] for key in ALERT_SUMMARY_FIELDS}
+        },
+        "scraping_activity": recent_scraping,
+        "performance": {key: stats[key] for key in PERFORMANCE_STAT_FIELDS},
+        "last_updated": datetime.utcnow().isoformat()
+    }
+    
+    # Serialize once; the same bytes are cached and sent
+    body = orjson.dumps(dashboard, default=orjson_default)
+    
+    if redis_client:
+        try:
+            await redis_client.set(cache_key, body, ex=DASHBOARD_CACHE_TTL)
+        except Exception as e:
+            logger.warning(f"Dashboard cache write failed: {str(e)}")
+    
+    return Response(content=body, media_type="application/json")
 
 @app.get("/api/competitors/{company_id}")
 async def get_competitors(
@@ -98,31 +231,35 @@ async def get_competitors(
         raise HTTPException(status_code=403, detail="Access denied")
     
     async with db_pool.acquire() as conn:
-        competitors = await conn.fetch("""
-            SELECT 
-                c.*,
-                COUNT(cd.id) as scraping_count,
-                MAX(cd.scraped_at) as last_scraped,
-                COUNT(a.id) as alert_count,
-                COUNT(CASE WHEN a.severity IN ('HIGH', 'CRITICAL') THEN 1 END) as high_alerts
-            FROM competitors c
-            LEFT JOIN competitor_data cd ON c.id = cd.competitor_id
-            LEFT JOIN alerts a ON c.id = a.competitor_id
-            WHERE c.company_id = $1
-            GROUP BY c.id
-            ORDER BY c.priority ASC, c.threat_level DESC, c.created_at DESC
-        """, company_id)
+        competitors = await conn.fetch(COMPETITORS_LIST_QUERY, company_id)
         
-        return {
-            "competitors": [dict(comp) for comp in competitors],
+        return RecordJSONResponse({
+            "competitors": [{k: v for k, v in comp.items() if k != 'active_count'} for comp in competitors],
             "total": len(competitors),
-            "active": len([c for c in competitors if c['monitoring_status'] == 'active'])
-        }
+            "active": competitors[0]['active_count'] if competitors else 0
+        })
+
+def normalize_website(website: str) -> str:
+    """Canonical competitor URL: https default, lowercase host, no default port or trailing slash"""
+    website = website.strip()
+    if not website.lower().startswith(('http://', 'https://')):
+        website = 'https://' + website
+    
+    try:
+        parsed = urlparse(website)
+        scheme = parsed.scheme.lower()
+        netloc = parsed.hostname or ''
+        if parsed.port and (scheme, parsed.port) not in (('http', 80), ('https', 443)):
+            netloc = f"{netloc}:{parsed.port}"
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid website URL")
+    
+    return urlunparse((scheme, netloc, parsed.path.rstrip('/'), parsed.params, parsed.query, ''))
 
 @app.post("/api/competitors/{company_id}")
 async def add_competitor(
     company_id: int,
-    request: Request,
+    competitor: CompetitorBase,
     background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user)
 ):
@@ -131,122 +268,165 @@ async def add_competitor(
         raise HTTPException(status_code=403, detail="Access denied")
     
     try:
-        data = await request.json()
-        
-        required_fields = ['name', 'website']
-        for field in required_fields:
-            if not data.get(field):
-                raise HTTPException(status_code=400, detail=f"Field '{field}' is required")
-        
-        # Validate website URL
-        website = data['website'].strip()
-        if not website.startswith(('http://', 'https://')):
-            website = 'https://' + website
+        website = normalize_website(competitor.website)
         
         async with db_pool.acquire() as conn:
-            # Check if competitor already exists
-            existing = await conn.fetchrow(
-                "SELECT id FROM competitors WHERE company_id = $1 AND website = $2",
-                company_id, website
-            )
-            if existing:
-                raise HTTPException(status_code=400, detail="Competitor already exists")
-            
-            # Check subscription limits
-            current_count = await conn.fetchval(
-                "SELECT COUNT(*) FROM competitors WHERE company_id = $1 AND monitoring_status = 'active'",
-                company_id
-            )
-            
-            # Get subscription plan limits
-            company = await conn.fetchrow("SELECT subscription_plan FROM companies WHERE id = $1", company_id)
-            plan_limits = {
-                'basic': 5,
-                'professional': 15,
-                'enterprise': 999999
-            }
-            
-            if current_count >= plan_limits.get(company['subscription_plan'], 5):
-                raise HTTPException(status_code=400, detail="Competitor limit reached for your subscription plan")
-            
-            # Insert new competitor
-            competitor_id = await conn.fetchval("""
-                INSERT INTO competitors (
-                    company_id, name, website, industry, location,
-                    threat_level, priority, monitoring_status
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-                RETURNING id
-            """,
+            # Insert new competitor only while under the subscription plan limit and not already tracked
+            result = await conn.fetchrow(ADD_COMPETITOR_QUERY,
                 company_id,
-                data['name'].strip(),
+                competitor.name.strip(),
                 website,
-                data.get('industry', ''),
-                data.get('location', ''),
-                data.get('threat_level', 'MEDIUM'),
-                data.get('priority', 1),
+                competitor.industry or '',
+                competitor.location or '',
+                competitor.threat_level.value,
+                competitor.priority,
                 'active'
             )
+            if not result or not result['within_limit']:
+                raise HTTPException(status_code=400, detail="Competitor limit reached for your subscription plan")
+            competitor_id = result['competitor_id']
+            if competitor_id is None:
+                raise HTTPException(status_code=400, detail="Competitor already exists")
             
             # Start initial scraping in background
             background_tasks.add_task(initial_competitor_scraping, competitor_id)
             
+            await invalidate_dashboard_cache(company_id)
+            
             return {
                 "success": True,
                 "competitor_id": competitor_id,
                 "message": "Competitor added successfully"
             }
             
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Add competitor error: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to add competitor")
 
+# Alert pages above this size are streamed as NDJSON from a server-side cursor
+ALERT_STREAM_THRESHOLD = 100
+ALERT_STREAM_BATCH = 200  # rows fetched per connection checkout while streaming
+ALERT_PAGE_MAX = 1000  # largest page a client may request
+
+def encode_alert_cursor(created_at: datetime, alert_id: int) -> str:
+    """Opaque pagination cursor pointing just past the given alert"""
+    return base64.urlsafe_b64encode(f"{created_at.isoformat()}|{alert_id}".encode()).decode()
+
+def decode_alert_cursor(cursor: str) -> tuple:
+    """Inverse of encode_alert_cursor; raises 400 on a malformed cursor"""
+    try:
+        created_at, alert_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+        return datetime.fromisoformat(created_at), int(alert_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def build_alerts_query(company_id: int, severity: Optional[str], after: Optional[tuple]) -> tuple:
+    """
+    Keyset query for a company's alerts, newest first
+    
+    Returns the query and its parameters; the row limit is bound as the
+    parameter after them.
+    """
+    where_clause = "WHERE a.company_id = $1"
+    params = [company_id]
+    
+    if severity:
+        params.append(severity.upper())
+        where_clause += f" AND a.severity = ${len(params)}"
+    
+    # Seek past the last alert already returned instead of scanning an OFFSET
+    if after:
+        params.extend(after)
+        where_clause += f" AND (a.created_at, a.id) < (${len(params) - 1}, ${len(params)})"
+    
+    query = f"""
+        SELECT 
+            a.*,
+            c.name as competitor_name,
+            c.website as competitor_website
+        FROM alerts a
+        LEFT JOIN competitors c ON a.competitor_id = c.id
+        {where_clause}
+        ORDER BY a.created_at DESC, a.id DESC
+        LIMIT ${len(params) + 1}
+    """
+    return query, params
+
+async def stream_alerts(company_id: int, severity: Optional[str], after: Optional[tuple], limit: int):
+    """
+    Yield alerts as NDJSON in keyset batches
+    
+    Each batch takes a pooled connection only for its own fetch, so a slow
+    client never holds a connection or transaction open. One alert per line,
+    followed by a final line carrying limit, next_cursor and has_more as in
+    the non-streamed response.
+    """
+    last = None
+    sent = 0
+    
+    while sent < limit:
+        batch_size = min(ALERT_STREAM_BATCH, limit - sent)
+        query, params = build_alerts_query(company_id, severity, after)
+        
+        async with db_pool.acquire() as conn:
+            # The extra row only signals that more alerts follow this batch
+            batch = await conn.fetch(query, *params, batch_size + 1)
+        
+        has_more = len(batch) > batch_size
+        for alert in batch[:batch_size]:
+            last = alert
+            sent += 1
+            yield orjson.dumps(alert, default=orjson_default) + b"\n"
+        
+        if not has_more:
+            break
+        after = (last['created_at'], last['id'])
+    
+    next_cursor = encode_alert_cursor(last['created_at'], last['id']) if has_more else None
+    yield orjson.dumps({"limit": limit, "next_cursor": next_cursor, "has_more": has_more}) + b"\n"
+
 @app.get("/api/alerts/{company_id}")
 async def get_alerts(
     company_id: int,
     severity: Optional[str] = None,
-    limit: int = 50,
-    offset: int = 0,
+    limit: int = Query(50, ge=1, le=ALERT_PAGE_MAX),
+    cursor: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Get alerts with filtering and pagination"""
+    """Get alerts with filtering and keyset pagination"""
     if current_user['id'] != company_id:
         raise HTTPException(status_code=403, detail="Access denied")
     
+    after = decode_alert_cursor(cursor) if cursor else None
+    
+    # Large exports are streamed instead of materialized in memory
+    if limit > ALERT_STREAM_THRESHOLD:
+        return StreamingResponse(
+            stream_alerts(company_id, severity, after, limit),
+            media_type="application/x-ndjson"
+        )
+    
+    query, params = build_alerts_query(company_id, severity, after)
+    
     async with db_pool.acquire() as conn:
-        # Build query with filters
-        where_clause = "WHERE a.company_id = $1"
-        params = [company_id]
-        
-        if severity:
-            where_clause += " AND a.severity = $2"
-            params.append(severity.upper())
-        
-        query = f"""
-            SELECT 
-                a.*,
-                c.name as competitor_name,
-                c.website as competitor_website
-            FROM alerts a
-            LEFT JOIN competitors c ON a.competitor_id = c.id
-            {where_clause}
-            ORDER BY a.created_at DESC
-            LIMIT ${len(params) + 1} OFFSET ${len(params) + 2}
-        """
-        params.extend([limit, offset])
-        
-        alerts = await conn.fetch(query, *params)
+        # One extra row tells us whether another page exists
+        alerts = await conn.fetch(query, *params, limit + 1)
+        has_more = len(alerts) > limit
+        alerts = alerts[:limit]
         
-        # Get total count
-        count_query = f"SELECT COUNT(*) FROM alerts a {where_clause}"
-        total = await conn.fetchval(count_query, *params[:-2])
+        next_cursor = None
+        if has_more:
+            last = alerts[-1]
+            next_cursor = encode_alert_cursor(last['created_at'], last['id'])
         
-        return {
-            "alerts": [dict(alert) for alert in alerts],
-            "total": total,
+        return RecordJSONResponse({
+            "alerts": alerts,
             "limit": limit,
-            "offset": offset,
-            "has_more": offset + limit < total
-        }
+            "next_cursor": next_cursor,
+            "has_more": has_more
+        })
 
 @app.post("/api/alerts/{alert_id}/read")
 async def mark_alert_read(
@@ -269,8 +449,10 @@ async def mark_alert_read(
             "UPDATE alerts SET is_read = TRUE WHERE id = $1",
             alert_id
         )
-        
-        return {"success": True, "message": "Alert marked as read"}
+    
+    await invalidate_dashboard_cache(alert['company_id'])
+    
+    return {"success": True, "message": "Alert marked as read"}
 
 @app.get("/api/reports/{company_id}")
 async def get_reports(
@@ -292,14 +474,14 @@ async def get_reports(
             LIMIT 20
         """, company_id)
         
-        return {
-            "reports": [dict(report) for report in reports]
-        }
+        return RecordJSONResponse({
+            "reports": reports
+        })
 
 @app.post("/api/reports/{company_id}/generate")
 async def generate_report(
     company_id: int,
-    request: Request,
+    report_request: ReportGenerateRequest,
     background_tasks: BackgroundTasks,
     current_user: dict = Depends(get_current_user)
 ):
@@ -308,8 +490,7 @@ async def generate_report(
         raise HTTPException(status_code=403, detail="Access denied")
     
     try:
-        data = await request.json()
-        report_type = data.get('report_type', 'weekly')
+        report_type = report_request.report_type.value
         
         # Start report generation in background
         background_tasks.add_task(generate_intelligence_report, company_id, report_type)
@@ -324,330 +505,14 @@ async def generate_report(
         raise HTTPException(status_code=500, detail="Failed to generate report")
 
 # Professional Client Dashboard
+LOGIN_PAGE_PATH = "static/login.html"
+
+# Read once at import; every request sends the same bytes
+with open(LOGIN_PAGE_PATH, 'rb') as login_page_file:
+    LOGIN_PAGE_BYTES = login_page_file.read()
+LOGIN_PAGE_HEADERS = {"Cache-Control": "public, max-age=3600"}
+
 @app.get("/app", response_class=HTMLResponse)
 async def serve_application():
     """Serve the main client application"""
-    return """
-    <!DOCTYPE html>
-    <html lang="en">
-    <head>
-        <meta charset="UTF-8">
-        <meta name="viewport" content="width=device-width, initial-scale=1.0">
-        <title>BlackFang Intelligence - Login</title>
-        <link rel="icon" href="data:image/svg+xml,<svg xmlns='http://www.w3.org/2000/svg' viewBox='0 0 100 100'><text y='.9em' font-size='90'>⚡</text></svg>">
-        <style>
-            * {
-                margin: 0;
-                padding: 0;
-                box-sizing: border-box;
-            }
-            
-            body {
-                font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif;
-                background: linear-gradient(135deg, #0c0c0c 0%, #1a1a1a 50%, #0c0c0c 100%);
-                color: #ffffff;
-                min-height: 100vh;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-                overflow-x: hidden;
-            }
-            
-            .container {
-                max-width: 1400px;
-                width: 100%;
-                padding: 20px;
-                display: flex;
-                align-items: center;
-                justify-content: center;
-            }
-            
-            .login-card {
-                background: linear-gradient(135deg, #1e1e1e 0%, #2a2a2a 100%);
-                padding: 50px;
-                border-radius: 20px;
-                box-shadow: 0 25px 50px rgba(0, 0, 0, 0.7), 0 0 0 1px rgba(255, 255, 255, 0.1);
-                max-width: 500px;
-                width: 100%;
-                position: relative;
-                overflow: hidden;
-            }
-            
-            .login-card::before {
-                content: '';
-                position: absolute;
-                top: 0;
-                left: 0;
-                right: 0;
-                height: 4px;
-                background: linear-gradient(90deg, #dc2626, #f59e0b, #10b981, #3b82f6, #8b5cf6);
-                border-radius: 20px 20px 0 0;
-            }
-            
-            .brand {
-                text-align: center;
-                margin-bottom: 40px;
-            }
-            
-            .brand h1 {
-                font-size: 32px;
-                font-weight: 700;
-                background: linear-gradient(135deg, #dc2626 0%, #f59e0b 100%);
-                -webkit-background-clip: text;
-                -webkit-text-fill-color: transparent;
-                background-clip: text;
-                margin-bottom: 8px;
-            }
-            
-            .brand p {
-                color: #888;
-                font-size: 16px;
-                font-weight: 400;
-            }
-            
-            .form-group {
-                margin-bottom: 25px;
-            }
-            
-            .form-group label {
-                display: block;
-                margin-bottom: 8px;
-                color: #e5e5e5;
-                font-weight: 500;
-                font-size: 14px;
-            }
-            
-            .form-group input {
-                width: 100%;
-                padding: 16px 20px;
-                border: 2px solid #333;
-                background: rgba(0, 0, 0, 0.3);
-                color: #ffffff;
-                border-radius: 12px;
-                font-size: 16px;
-                transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-                backdrop-filter: blur(10px);
-            }
-            
-            .form-group input:focus {
-                outline: none;
-                border-color: #dc2626;
-                box-shadow: 0 0 0 3px rgba(220, 38, 38, 0.1);
-                background: rgba(0, 0, 0, 0.5);
-            }
-            
-            .login-btn {
-                width: 100%;
-                padding: 16px;
-                background: linear-gradient(135deg, #dc2626 0%, #b91c1c 100%);
-                border: none;
-                border-radius: 12px;
-                color: white;
-                font-size: 16px;
-                font-weight: 600;
-                cursor: pointer;
-                transition: all 0.3s cubic-bezier(0.4, 0, 0.2, 1);
-                position: relative;
-                overflow: hidden;
-            }
-            
-            .login-btn:hover {
-                transform: translateY(-2px);
-                box-shadow: 0 10px 25px rgba(220, 38, 38, 0.4);
-            }
-            
-            .login-btn:active {
-                transform: translateY(0);
-            }
-            
-            .login-btn:disabled {
-                opacity: 0.7;
-                cursor: not-allowed;
-                transform: none;
-            }
-            
-            .demo-info {
-                margin-top: 30px;
-                padding: 20px;
-                background: rgba(220, 38, 38, 0.1);
-                border-radius: 12px;
-                border-left: 4px solid #dc2626;
-            }
-            
-            .demo-info h3 {
-                color: #dc2626;
-                margin-bottom: 12px;
-                font-size: 18px;
-            }
-            
-            .demo-info p {
-                margin-bottom: 8px;
-                line-height: 1.6;
-                color: #ccc;
-            }
-            
-            .loading {
-                display: none;
-                text-align: center;
-                margin-top: 20px;
-            }
-            
-            .spinner {
-                border: 3px solid rgba(255, 255, 255, 0.1);
-                border-top: 3px solid #dc2626;
-                border-radius: 50%;
-                width: 40px;
-                height: 40px;
-                animation: spin 1s linear infinite;
-                margin: 0 auto 15px;
-            }
-            
-            @keyframes spin {
-                0% { transform: rotate(0deg); }
-                100% { transform: rotate(360deg); }
-            }
-            
-            .error-message {
-                background: rgba(220, 38, 38, 0.1);
-                color: #dc2626;
-                padding: 12px 16px;
-                border-radius: 8px;
-                border-left: 4px solid #dc2626;
-                margin-bottom: 20px;
-                display: none;
-            }
-            
-            @media (max-width: 768px) {
-                .login-card {
-                    padding: 30px 25px;
-                    margin: 20px;
-                }
-                
-                .brand h1 {
-                    font-size: 28px;
-                }
-            }
-        </style>
-    </head>
-    <body>
-        <div class="container">
-            <div class="login-card">
-                <div class="brand">
-                    <h1>⚡ BLACKFANG INTELLIGENCE</h1>
-                    <p>Advanced Competitive Intelligence Platform</p>
-                </div>
-                
-                <div id="error-message" class="error-message"></div>
-                
-                <form id="loginForm">
-                    <div class="form-group">
-                        <label for="email">Email Address</label>
-                        <input type="email" id="email" name="email" value="demo@blackfangintel.com" required autocomplete="email">
-                    </div>
-                    
-                    <div class="form-group">
-                        <label for="password">Password</label>
-                        <input type="password" id="password" name="password" value="demo123" required autocomplete="current-password">
-                    </div>
-                    
-                    <button type="submit" class="login-btn" id="loginBtn">
-                        Access Intelligence Platform
-                    </button>
-                </form>
-                
-                <div class="loading" id="loading">
-                    <div class="spinner"></div>
-                    <p>Authenticating and loading your dashboard...</p>
-                </div>
-                
-                <div class="demo-info">
-                    <h3>🎯 Demo Account Access</h3>
-                    <p><strong>Email:</strong> demo@blackfangintel.com</p>
-                    <p><strong>Password:</strong> demo123</p>
-                    <p>Experience the complete competitive intelligence platform with real-time monitoring, threat detection, and strategic recommendations.</p>
-                </div>
-            </div>
-        </div>
-        
-        <script>
-            const API_BASE = '';
-            
-            function showError(message) {
-                const errorDiv = document.getElementById('error-message');
-                errorDiv.textContent = message;
-                errorDiv.style.display = 'block';
-                setTimeout(() => {
-                    errorDiv.style.display = 'none';
-                }, 5000);
-            }
-            
-            function showLoading(show) {
-                const form = document.getElementById('loginForm');
-                const loading = document.getElementById('loading');
-                const btn = document.getElementById('loginBtn');
-                
-                if (show) {
-                    form.style.display = 'none';
-                    loading.style.display = 'block';
-                    btn.disabled = true;
-                } else {
-                    form.style.display = 'block';
-                    loading.style.display = 'none';
-                    btn.disabled = false;
-                }
-            }
-            
-            document.getElementById('loginForm').addEventListener('submit', async (e) => {
-                e.preventDefault();
-                
-                const email = document.getElementById('email').value.trim();
-                const password = document.getElementById('password').value;
-                
-                if (!email || !password) {
-                    showError('Please enter both email and password');
-                    return;
-                }
-                
-                showLoading(true);
-                
-                try {
-                    const response = await fetch(`${API_BASE}/api/auth/login`, {
-                        method: 'POST',
-                        headers: {
-                            'Content-Type': 'application/json'
-                        },
-                        body: JSON.stringify({ email, password })
-                    });
-                    
-                    const data = await response.json();
-                    
-                    if (data.success) {
-                        // Store tokens
-                        localStorage.setItem('access_token', data.access_token);
-                        localStorage.setItem('refresh_token', data.refresh_token);
-                        localStorage.setItem('user_data', JSON.stringify(data.user));
-                        
-                        // Redirect to dashboard
-                        window.location.href = `/dashboard/${data.user.id}`;
-                    } else {
-                        showError(data.detail || 'Login failed. Please check your credentials.');
-                        showLoading(false);
-                    }
-                } catch (error) {
-                    console.error('Login error:', error);
-                    showError('Connection error. Please check your internet connection and try again.');
-                    showLoading(false);
-                }
-            });
-            
-            // Check if already logged in
-            if (localStorage.getItem('access_token')) {
-                const userData = JSON.parse(localStorage.getItem('user_data') || '{}');
-                if (userData.id) {
-                    window.location.href = `/dashboard/${userData.id}`;
-                }
-            }
-        </script>
-    </body>
-    </html>
-    """
\ No newline at end of file
+    return Response(LOGIN_PAGE_BYTES, media_type="text/html", headers=LOGIN_PAGE_HEADERS)
@@ -8,18 +8,21 @@ import os
 import asyncio
 import logging
 from contextlib import asynccontextmanager
+from typing import Any, Dict
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from fastapi.responses import HTMLResponse
+from jinja2 import FileSystemBytecodeCache
 
 # Local imports
-from database import init_database, close_database
+from database import init_database, close_database, listen_company_changes, invalidate_company
+from auth import session_manager
 from models import *
 from config import settings
-from api.auth import auth_router
+from api.auth import auth_router, invalidate_user_cache
 from api.dashboard import dashboard_router  
 from api.competitors import competitors_router
 from api.alerts import alerts_router
@@ -31,17 +34,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Page templates with no per-request data, rendered once at startup
+STATIC_PAGES: Dict[str, Dict[str, Any]] = {
+    "index.html": {"title": "BlackFang Intelligence", "version": "2.0.0"},
+    "login.html": {"title": "Login - BlackFang Intelligence"},
+    "competitors.html": {"title": "Competitors - BlackFang Intelligence"},
+    "alerts.html": {"title": "Alerts - BlackFang Intelligence"},
+    "reports.html": {"title": "Reports - BlackFang Intelligence"},
+    "settings.html": {"title": "Settings - BlackFang Intelligence"}
+}
+
+# The dashboard shell is pre-rendered with this marker in place of the company id
+DASHBOARD_TITLE = "Dashboard - BlackFang Intelligence"
+COMPANY_ID_PLACEHOLDER = "__BLACKFANG_COMPANY_ID__"
+
+prerendered_pages: Dict[str, str] = {}
+
+def prerender_pages() -> None:
+    """Render request-independent templates once so page requests skip Jinja"""
+    def url_for(name: str, **path_params: Any) -> str:
+        # Path-only URLs; there is no request to take a host from
+        return app.url_path_for(name, **path_params)
+    
+    pages = dict(STATIC_PAGES)
+    pages["dashboard.html"] = {"title": DASHBOARD_TITLE, "company_id": COMPANY_ID_PLACEHOLDER}
+    
+    for name, context in pages.items():
+        try:
+            prerendered_pages[name] = templates.get_template(name).render(url_for=url_for, **context)
+        except Exception as e:
+            logger.warning(f"Pre-rendering {name} failed, rendering per request: {e}")
+
+def render_page(request: Request, name: str) -> HTMLResponse:
+    """Serve a static page, pre-rendered when available"""
+    html = prerendered_pages.get(name)
+    if html is not None:
+        return HTMLResponse(html)
+    return templates.TemplateResponse(name, {"request": request, **STATIC_PAGES[name]})
+
 # Application lifespan management
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Manage application lifecycle"""
     logger.info("🚀 Starting BlackFang Intelligence Platform...")
     
+    prerender_pages()
+    
     try:
         # Initialize database
         await init_database()
         logger.info("✅ Database initialized successfully")
         
+        # Connect session storage
+        await session_manager.connect()
+        
+        # Keep the /me and company row caches in sync with company updates
+        await listen_company_changes(invalidate_user_cache)
+        await listen_company_changes(invalidate_company)
+        
         logger.info("🎯 BlackFang Intelligence is OPERATIONAL")
         
     except Exception as e:
@@ -57,6 +107,8 @@ async def lifespan(app: FastAPI):
     try:
         await close_database()
         logger.info("🗄️ Database connections closed")
+        
+        await session_manager.close()
     except Exception as e:
         logger.error(f"Cleanup error: {e}")
 
@@ -82,6 +134,7 @@ app.add_middleware(
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
+templates.env.bytecode_cache = FileSystemBytecodeCache()
 
 # Include API routers
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
@@ -93,60 +146,44 @@ app.include_router(alerts_router, prefix="/api/alerts", tags=["Alerts"])
 @app.get("/", response_class=HTMLResponse)
 async def root(request: Request):
     """Landing page"""
-    return templates.TemplateResponse("index.html", {
-        "request": request,
-        "title": "BlackFang Intelligence",
-        "version": "2.0.0"
-    })
+    return render_page(request, "index.html")
 
 @app.get("/app", response_class=HTMLResponse)
 async def login_page(request: Request):
     """Client login page"""
-    return templates.TemplateResponse("login.html", {
-        "request": request,
-        "title": "Login - BlackFang Intelligence"
-    })
+    return render_page(request, "login.html")
 
 @app.get("/dashboard/{company_id}", response_class=HTMLResponse)
 async def dashboard_page(company_id: int, request: Request):
     """Intelligence dashboard"""
+    html = prerendered_pages.get("dashboard.html")
+    if html is not None:
+        return HTMLResponse(html.replace(COMPANY_ID_PLACEHOLDER, str(company_id)))
     return templates.TemplateResponse("dashboard.html", {
         "request": request,
         "company_id": company_id,
-        "title": "Dashboard - BlackFang Intelligence"
+        "title": DASHBOARD_TITLE
     })
 
 @app.get("/competitors", response_class=HTMLResponse)  
 async def competitors_page(request: Request):
     """Competitor management page"""
-    return templates.TemplateResponse("competitors.html", {
-        "request": request,
-        "title": "Competitors - BlackFang Intelligence"
-    })
+    return render_page(request, "competitors.html")
 
 @app.get("/alerts", response_class=HTMLResponse)
 async def alerts_page(request: Request):
     """Alerts management page"""
-    return templates.TemplateResponse("alerts.html", {
-        "request": request,
-        "title": "Alerts - BlackFang Intelligence"
-    })
+    return render_page(request, "alerts.html")
 
 @app.get("/reports", response_class=HTMLResponse)
 async def reports_page(request: Request):
     """Intelligence reports page"""
-    return templates.TemplateResponse("reports.html", {
-        "request": request,
-        "title": "Reports - BlackFang Intelligence"
-    })
+    return render_page(request, "reports.html")
 
 @app.get("/settings", response_class=HTMLResponse)
 async def settings_page(request: Request):
     """User settings page"""
-    return templates.TemplateResponse("settings.html", {
-        "request": request,
-        "title": "Settings - BlackFang Intelligence"
-    })
+    return render_page(request, "settings.html")
 
 @app.get("/health")
 async def health_check():
@@ -181,5 +218,7 @@ if __name__ == "__main__":
         host=settings.HOST,
         port=settings.PORT,
         log_level=settings.LOG_LEVEL.lower(),
-        reload=settings.ENVIRONMENT == "development"
+        reload=settings.ENVIRONMENT == "development",
+        loop="uvloop",
+        http="httptools"
     )
\ No newline at end of file
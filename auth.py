@@ -2,24 +2,121 @@
 BlackFang Intelligence - Authentication and Security
 """
 
+import base64
+import json
+import logging
+import re
 import secrets
 import hashlib
+import hmac
+import time
 import jwt
-from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+import orjson
+import redis.asyncio as redis
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Set, Tuple
 from fastapi import HTTPException, status, Depends
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from config import settings
 
+# fastpbkdf2 (optional) keeps the HMAC inner/outer pad states across rounds;
+# hashlib's OpenSSL-backed implementation is the fallback
+try:
+    from fastpbkdf2 import pbkdf2_hmac
+except ImportError:
+    from hashlib import pbkdf2_hmac
+
+# PyJWT is required; python-jose also installs a top-level "jwt" module with a different API
+if not hasattr(jwt, "PyJWTError"):
+    raise ImportError("auth requires PyJWT (pip install PyJWT), not python-jose")
+
+class OrjsonJWT(jwt.PyJWT):
+    """PyJWT with orjson for payload serialization and parsing"""
+    
+    def _encode_payload(self, payload: Dict[str, Any], headers: Optional[Dict[str, Any]] = None, json_encoder: Any = None) -> bytes:
+        return orjson.dumps(payload)
+    
+    def _decode_payload(self, decoded: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            payload = orjson.loads(decoded["payload"])
+        except orjson.JSONDecodeError as e:
+            raise jwt.DecodeError(f"Invalid payload string: {e}")
+        if not isinstance(payload, dict):
+            raise jwt.DecodeError("Invalid payload string: must be a json object")
+        return payload
+
+_jwt = OrjsonJWT()
+
+# Hot-path settings bound once at import; the secret is pre-encoded since PyJWT signs with bytes
+JWT_SECRET = settings.JWT_SECRET.encode('utf-8')
+JWT_ALGORITHM = settings.JWT_ALGORITHM
+JWT_ALGORITHMS = [JWT_ALGORITHM]
+JWT_VERIFY_CACHE_TTL = settings.JWT_VERIFY_CACHE_TTL
+
+# Claims every access/refresh token must carry; PyJWT rejects tokens missing any of them
+_JWT_DECODE_OPTIONS = {"require": ["exp", "iat", "type"]}
+
 # Security instance
 security = HTTPBearer()
 
+logger = logging.getLogger(__name__)
+
+PBKDF2_ITERATIONS = 100000  # 100k iterations for security
+STORED_HASH_LENGTH = 88  # base64 of 32-byte hash + 32-byte salt
+LEGACY_HASH_LENGTH = 64 + 1 + 64  # hex digest ':' hex salt
+
+# bf_<company id>_<unix timestamp>_<random part>
+API_KEY_PATTERN = re.compile(r"bf_([0-9]+)_([0-9]+)_[A-Za-z0-9_-]+")
+
+# Recently verified token payloads keyed by token digest; failed verifications are never cached
+_VERIFY_CACHE: Dict[bytes, Tuple[float, Dict[str, Any]]] = {}
+_VERIFY_CACHE_MAX_SIZE = 10_000
+
+def _cache_verified_payload(key: bytes, payload: Dict[str, Any]) -> None:
+    """Remember a verified payload until the cache TTL or token expiry, whichever is sooner"""
+    cache_until = min(time.time() + JWT_VERIFY_CACHE_TTL, payload["exp"])
+    if len(_VERIFY_CACHE) >= _VERIFY_CACHE_MAX_SIZE:
+        _VERIFY_CACHE.pop(next(iter(_VERIFY_CACHE)))
+    _VERIFY_CACHE[key] = (cache_until, payload)
+
+def _verify_cache_key(token: str) -> bytes:
+    """Key a token by digest so the cache never holds raw bearer credentials"""
+    return hashlib.sha256(token.encode('utf-8')).digest()[:16]
+
+def invalidate_verified_token(token: str) -> None:
+    """Drop a token's cached payload (logout, password change)"""
+    _VERIFY_CACHE.pop(_verify_cache_key(token), None)
+
+def _unverified_claims(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Read a JWT payload without checking its signature
+    
+    Only used to reject tokens early; nothing read here is trusted or cached.
+    
+    Args:
+        token: JWT token string
+        
+    Returns:
+        Payload claims, or None if the token is not a structurally valid JWT
+    """
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+    
+    payload_b64 = parts[1]
+    try:
+        claims = orjson.loads(base64.urlsafe_b64decode(payload_b64 + '=' * (-len(payload_b64) % 4)))
+    except ValueError:
+        return None
+    
+    return claims if isinstance(claims, dict) else None
+
 class AuthManager:
     """Comprehensive authentication and security management"""
     
     def __init__(self):
-        self.secret_key = settings.JWT_SECRET
-        self.algorithm = settings.JWT_ALGORITHM
+        self.secret_key = JWT_SECRET
+        self.algorithm = JWT_ALGORITHM
         self.access_token_expire_minutes = settings.JWT_ACCESS_TOKEN_EXPIRE_MINUTES
         self.refresh_token_expire_days = settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS
     
@@ -31,20 +128,20 @@ class AuthManager:
             password: Plain text password
             
         Returns:
-            Hashed password with salt (format: hash:salt)
+            Base64 of the 32-byte hash followed by the 32-byte salt
         """
         # Generate random salt
-        salt = secrets.token_hex(32)
+        salt = secrets.token_bytes(32)
         
         # Hash password with salt using PBKDF2
-        hashed = hashlib.pbkdf2_hmac(
+        hashed = pbkdf2_hmac(
             'sha256',
             password.encode('utf-8'),
-            salt.encode('utf-8'),
-            100000  # 100k iterations for security
+            salt,
+            PBKDF2_ITERATIONS
         )
         
-        return hashed.hex() + ':' + salt
+        return base64.b64encode(hashed + salt).decode('ascii')
     
     def verify_password(self, password: str, hashed_password: str) -> bool:
         """
@@ -52,26 +149,34 @@ class AuthManager:
         
         Args:
             password: Plain text password to verify
-            hashed_password: Stored hash from database (format: hash:salt)
+            hashed_password: Stored hash from database (base64 hash+salt, or legacy hex hash:salt)
             
         Returns:
             True if password matches, False otherwise
         """
         try:
-            stored_hash, salt = hashed_password.split(':')
+            if len(hashed_password) == STORED_HASH_LENGTH:
+                blob = base64.b64decode(hashed_password)
+                stored_hash, salt = blob[:32], blob[32:]
+            elif len(hashed_password) == LEGACY_HASH_LENGTH and hashed_password[64] == ':':
+                # Older hashes: 64 hex chars, ':', then a 64-char hex salt used as text
+                stored_hash = bytes.fromhex(hashed_password[:64])
+                salt = hashed_password[65:].encode('utf-8')
+            else:
+                return False
             
             # Hash the provided password with stored salt
-            computed_hash = hashlib.pbkdf2_hmac(
+            computed_hash = pbkdf2_hmac(
                 'sha256',
                 password.encode('utf-8'),
-                salt.encode('utf-8'),
-                100000
+                salt,
+                PBKDF2_ITERATIONS
             )
             
-            # Constant-time comparison to prevent timing attacks
-            return secrets.compare_digest(computed_hash.hex(), stored_hash)
+            # Constant-time comparison of the raw digests to prevent timing attacks
+            return hmac.compare_digest(computed_hash, stored_hash)
             
-        except (ValueError, AttributeError):
+        except (ValueError, TypeError):
             return False
     
     def create_access_token(self, data: Dict[str, Any]) -> str:
@@ -85,15 +190,15 @@ class AuthManager:
             JWT access token string
         """
         to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(minutes=self.access_token_expire_minutes)
+        now = int(time.time())
         
         to_encode.update({
-            "exp": expire,
-            "iat": datetime.utcnow(),
+            "exp": now + self.access_token_expire_minutes * 60,
+            "iat": now,
             "type": "access"
         })
         
-        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        return _jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
     
     def create_refresh_token(self, data: Dict[str, Any]) -> str:
         """
@@ -106,15 +211,15 @@ class AuthManager:
             JWT refresh token string
         """
         to_encode = data.copy()
-        expire = datetime.utcnow() + timedelta(days=self.refresh_token_expire_days)
+        now = int(time.time())
         
         to_encode.update({
-            "exp": expire,
-            "iat": datetime.utcnow(),
+            "exp": now + self.refresh_token_expire_days * 24 * 60 * 60,
+            "iat": now,
             "type": "refresh"
         })
         
-        return jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
+        return _jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
     
     def decode_token(self, token: str, token_type: str = "access") -> Dict[str, Any]:
         """
@@ -130,27 +235,49 @@ class AuthManager:
         Raises:
             HTTPException: If token is invalid or expired
         """
-        try:
-            payload = jwt.decode(
-                token, 
-                self.secret_key, 
-                algorithms=[self.algorithm]
-            )
-            
-            # Verify token type
+        # Repeat presentations of a token skip signature verification
+        cache_key = _verify_cache_key(token)
+        cached = _VERIFY_CACHE.get(cache_key)
+        if cached and cached[0] > time.time():
+            payload = cached[1]
             if payload.get("type") != token_type:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail=f"Invalid token type. Expected {token_type}"
                 )
+            return payload
+        
+        # Reject malformed, wrong-type and expired tokens before paying for HMAC verification;
+        # the signature check below covers the same payload bytes
+        claims = _unverified_claims(token)
+        if claims is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid token: malformed"
+            )
+        
+        if claims.get("type") != token_type:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=f"Invalid token type. Expected {token_type}"
+            )
+        
+        exp = claims.get("exp")
+        if isinstance(exp, (int, float)) and exp < time.time():
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has expired"
+            )
+        
+        try:
+            payload = _jwt.decode(
+                token, 
+                self.secret_key, 
+                algorithms=JWT_ALGORITHMS,
+                options=_JWT_DECODE_OPTIONS
+            )
             
-            # Check expiration (jwt library handles this, but explicit check)
-            if datetime.fromtimestamp(payload["exp"]) < datetime.utcnow():
-                raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Token has expired"
-                )
-            
+            _cache_verified_payload(cache_key, payload)
             return payload
             
         except jwt.ExpiredSignatureError:
@@ -158,7 +285,7 @@ class AuthManager:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token has expired"
             )
-        except jwt.JWTError as e:
+        except jwt.PyJWTError as e:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=f"Invalid token: {str(e)}"
@@ -176,8 +303,8 @@ class AuthManager:
             Secure API key string
         """
         # Create unique identifier
-        timestamp = int(datetime.utcnow().timestamp())
-        random_part = secrets.token_hex(16)
+        timestamp = int(time.time())
+        random_part = secrets.token_urlsafe(16)
         
         # Create API key with company prefix
         api_key = f"bf_{company_id}_{timestamp}_{random_part}"
@@ -194,31 +321,36 @@ class AuthManager:
         Returns:
             Dictionary with company_id and creation timestamp, or None if invalid
         """
+        # One C-level pass over the whole key; random part is base64url (older keys: hex)
+        match = API_KEY_PATTERN.fullmatch(api_key)
+        if not match:
+            return None
+        
+        company_id, timestamp = match.groups()
         try:
-            if not api_key.startswith("bf_"):
-                return None
-            
-            parts = api_key.split("_")
-            if len(parts) != 4:
-                return None
-            
-            company_id = int(parts[1])
-            timestamp = int(parts[2])
-            
-            return {
-                "company_id": company_id,
-                "created_at": datetime.fromtimestamp(timestamp),
-                "key_format_valid": True
-            }
-            
-        except (ValueError, IndexError):
+            created_at = datetime.fromtimestamp(int(timestamp))
+        except (ValueError, OverflowError, OSError):
             return None
+        
+        return {
+            "company_id": int(company_id),
+            "created_at": created_at,
+            "key_format_valid": True
+        }
 
 # Global auth manager instance
 auth_manager = AuthManager()
 
+class CurrentUser(NamedTuple):
+    """Authenticated user resolved from an access token"""
+    id: int
+    email: Optional[str]
+    subscription_plan: Optional[str]
+    token_issued_at: Optional[int]
+    token_expires_at: Optional[int]
+
 # Dependency functions for FastAPI
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Dict[str, Any]:
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> CurrentUser:
     """
     Get current authenticated user from JWT token
     
@@ -244,13 +376,13 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             )
         
         # Return user data (could be enhanced with database lookup)
-        return {
-            "id": company_id,
-            "email": payload.get("email"),
-            "subscription_plan": payload.get("subscription_plan"),
-            "token_issued_at": payload.get("iat"),
-            "token_expires_at": payload.get("exp")
-        }
+        return CurrentUser(
+            company_id,
+            payload.get("email"),
+            payload.get("subscription_plan"),
+            payload.get("iat"),
+            payload.get("exp")
+        )
         
     except HTTPException:
         raise
@@ -260,7 +392,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             detail=f"Authentication failed: {str(e)}"
         )
 
-async def get_current_active_user(current_user: Dict[str, Any] = Depends(get_current_user)) -> Dict[str, Any]:
+async def get_current_active_user(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
     """
     Get current active user (extended version for additional checks)
     
@@ -282,13 +414,51 @@ async def get_current_active_user(current_user: Dict[str, Any] = Depends(get_cur
     # For now, return the user data
     return current_user
 
+# Subscription plan hierarchy (unknown plans rank below basic)
+PLAN_LEVELS = {
+    "basic": 1,
+    "professional": 2,
+    "enterprise": 3
+}
+
+def require_plan(required_plan: str = "basic") -> Callable[..., Awaitable[CurrentUser]]:
+    """
+    Build a dependency that requires a minimum subscription level
+    
+    The required level is resolved once here, so each request only looks
+    up the user's plan and compares two integers.
+    
+    Args:
+        required_plan: Minimum required subscription plan
+        
+    Returns:
+        FastAPI dependency returning the current user if access is granted
+    """
+    required_level = PLAN_LEVELS.get(required_plan, 1)
+    
+    async def verify_plan(current_user: CurrentUser = Depends(get_current_user)) -> CurrentUser:
+        user_plan = current_user.subscription_plan
+        
+        if PLAN_LEVELS.get(user_plan, 0) < required_level:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail=f"Subscription upgrade required. Current: {user_plan}, Required: {required_plan}"
+            )
+        
+        return current_user
+    
+    return verify_plan
+
 async def verify_subscription_access(
     required_plan: str = "basic",
-    current_user: Dict[str, Any] = Depends(get_current_user)
-) -> Dict[str, Any]:
+    current_user: CurrentUser = Depends(get_current_user)
+) -> CurrentUser:
     """
     Verify user has required subscription level
     
+    Kept with its original signature for existing callers; new routes should
+    depend on require_plan(), which resolves the required level once.
+    
     Args:
         required_plan: Minimum required subscription plan
         current_user: Current user data
@@ -299,27 +469,29 @@ async def verify_subscription_access(
     Raises:
         HTTPException: If insufficient subscription level
     """
-    user_plan = current_user.get("subscription_plan", "basic")
-    
-    # Define plan hierarchy
-    plan_hierarchy = {
-        "basic": 1,
-        "professional": 2,
-        "enterprise": 3
-    }
-    
-    user_level = plan_hierarchy.get(user_plan, 0)
-    required_level = plan_hierarchy.get(required_plan, 1)
-    
-    if user_level < required_level:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail=f"Subscription upgrade required. Current: {user_plan}, Required: {required_plan}"
-        )
-    
-    return current_user
+    return await require_plan(required_plan)(current_user)
 
 # Utility functions for security
+SPECIAL_CHARS = frozenset("!@#$%^&*()_+-=[]{}|;:,.<>?")
+
+# Character classes checked by validate_password_strength
+CHAR_OTHER, CHAR_UPPER, CHAR_LOWER, CHAR_DIGIT, CHAR_SPECIAL = range(5)
+
+def _char_class(c: str) -> int:
+    """Password character class of a single character"""
+    if c.isupper():
+        return CHAR_UPPER
+    if c.islower():
+        return CHAR_LOWER
+    if c.isdigit():
+        return CHAR_DIGIT
+    if c in SPECIAL_CHARS:
+        return CHAR_SPECIAL
+    return CHAR_OTHER
+
+# Byte -> class table for ASCII passwords (bytes >= 128 never occur in ASCII input)
+_CHAR_CLASS_TABLE = bytes(_char_class(chr(b)) for b in range(128)) + bytes(128)
+
 def validate_password_strength(password: str) -> Dict[str, Any]:
     """
     Validate password strength
@@ -336,41 +508,26 @@ def validate_password_strength(password: str) -> Dict[str, Any]:
         "score": 0
     }
     
-    # Check length
-    if len(password) < 8:
-        result["errors"].append("Password must be at least 8 characters long")
-        result["valid"] = False
-    else:
-        result["score"] += 1
-    
-    # Check for uppercase
-    if not any(c.isupper() for c in password):
-        result["errors"].append("Password must contain at least one uppercase letter")
-        result["valid"] = False
+    # Classify every character in one pass: a C-level translate for ASCII input
+    if password.isascii():
+        present = set(password.encode('ascii').translate(_CHAR_CLASS_TABLE))
     else:
-        result["score"] += 1
-    
-    # Check for lowercase
-    if not any(c.islower() for c in password):
-        result["errors"].append("Password must contain at least one lowercase letter")
-        result["valid"] = False
-    else:
-        result["score"] += 1
-    
-    # Check for digits
-    if not any(c.isdigit() for c in password):
-        result["errors"].append("Password must contain at least one number")
-        result["valid"] = False
-    else:
-        result["score"] += 1
-    
-    # Check for special characters
-    special_chars = "!@#$%^&*()_+-=[]{}|;:,.<>?"
-    if not any(c in special_chars for c in password):
-        result["errors"].append("Password must contain at least one special character")
-        result["valid"] = False
-    else:
-        result["score"] += 1
+        present = set(map(_char_class, password))
+    
+    checks = (
+        (len(password) >= 8, "Password must be at least 8 characters long"),
+        (CHAR_UPPER in present, "Password must contain at least one uppercase letter"),
+        (CHAR_LOWER in present, "Password must contain at least one lowercase letter"),
+        (CHAR_DIGIT in present, "Password must contain at least one number"),
+        (CHAR_SPECIAL in present, "Password must contain at least one special character")
+    )
+    
+    for passed, error in checks:
+        if passed:
+            result["score"] += 1
+        else:
+            result["errors"].append(error)
+            result["valid"] = False
     
     return result
 
@@ -382,9 +539,9 @@ def generate_secure_token(length: int = 32) -> str:
         length: Token length in bytes
         
     Returns:
-        Hex-encoded secure token
+        URL-safe base64-encoded secure token
     """
-    return secrets.token_hex(length)
+    return secrets.token_urlsafe(length)
 
 def create_password_reset_token(email: str) -> str:
     """
@@ -399,10 +556,10 @@ def create_password_reset_token(email: str) -> str:
     data = {
         "email": email,
         "purpose": "password_reset",
-        "exp": datetime.utcnow() + timedelta(hours=1)  # 1 hour expiry
+        "exp": int(time.time()) + 60 * 60  # 1 hour expiry
     }
     
-    return jwt.encode(data, settings.JWT_SECRET, algorithm=settings.JWT_ALGORITHM)
+    return _jwt.encode(data, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
 def verify_password_reset_token(token: str) -> Optional[str]:
     """
@@ -415,46 +572,118 @@ def verify_password_reset_token(token: str) -> Optional[str]:
         Email address if valid, None if invalid
     """
     try:
-        payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
+        payload = _jwt.decode(token, JWT_SECRET, algorithms=JWT_ALGORITHMS)
         
         if payload.get("purpose") != "password_reset":
             return None
         
         return payload.get("email")
         
-    except jwt.JWTError:
+    except jwt.PyJWTError:
         return None
 
+# Deletes a company's session set and every session it lists in one round-trip
+REVOKE_ALL_SESSIONS_SCRIPT = """
+local session_keys = redis.call('SMEMBERS', KEYS[1])
+for i = 1, #session_keys, 5000 do
+    redis.call('DEL', unpack(session_keys, i, math.min(i + 4999, #session_keys)))
+end
+redis.call('DEL', KEYS[1])
+return #session_keys
+"""
+
 # Session management for refresh tokens
 class SessionManager:
     """Manage user sessions and refresh tokens"""
     
     def __init__(self):
-        self.active_sessions = {}  # In production, use Redis
+        self.redis: Optional[redis.Redis] = None
+        self._revoke_all_script = None
+        self.active_sessions = {}  # Fallback when Redis is unavailable
+        self._sessions_by_company: Dict[int, Set[str]] = {}  # Fallback index: company id -> session keys
+        self.session_ttl = settings.JWT_REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+    
+    async def connect(self) -> None:
+        """Connect session storage to Redis, keeping in-process storage if unreachable"""
+        try:
+            client = redis.from_url(settings.REDIS_URL)
+            await client.ping()
+            self.redis = client
+            self._revoke_all_script = client.register_script(REVOKE_ALL_SESSIONS_SCRIPT)
+            logger.info("Session storage connected to Redis")
+        except (redis.RedisError, OSError) as e:
+            logger.warning(f"Redis unavailable for sessions, using in-process storage: {e}")
+    
+    async def close(self) -> None:
+        """Close Redis connection"""
+        if self.redis:
+            await self.redis.close()
+            self.redis = None
+    
+    @staticmethod
+    def _token_key(refresh_token: str) -> str:
+        """Storage key for a refresh token (the plaintext token is never stored)"""
+        return "session:" + hashlib.sha256(refresh_token.encode('utf-8')).hexdigest()
+    
+    @staticmethod
+    def _company_key(company_id: int) -> str:
+        """Storage key for the set of session keys belonging to a company"""
+        return f"company:{company_id}:sessions"
     
     async def create_session(self, company_id: int, refresh_token: str) -> None:
         """Create user session"""
-        # In production, store in database or Redis
-        self.active_sessions[refresh_token] = {
+        key = self._token_key(refresh_token)
+        session_data = {
             "company_id": company_id,
             "created_at": datetime.utcnow(),
             "is_active": True
         }
+        
+        if not self.redis:
+            self.active_sessions[key] = session_data
+            self._sessions_by_company.setdefault(company_id, set()).add(key)
+            return
+        
+        session_data["created_at"] = session_data["created_at"].isoformat()
+        company_key = self._company_key(company_id)
+        
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(key, json.dumps(session_data), ex=self.session_ttl)
+            pipe.sadd(company_key, key)
+            pipe.expire(company_key, self.session_ttl)
+            await pipe.execute()
     
     async def validate_session(self, refresh_token: str) -> Optional[Dict[str, Any]]:
         """Validate session exists and is active"""
-        return self.active_sessions.get(refresh_token)
+        key = self._token_key(refresh_token)
+        
+        if not self.redis:
+            return self.active_sessions.get(key)
+        
+        session_data = await self.redis.get(key)
+        return json.loads(session_data) if session_data else None
     
     async def revoke_session(self, refresh_token: str) -> None:
         """Revoke user session"""
-        if refresh_token in self.active_sessions:
-            self.active_sessions[refresh_token]["is_active"] = False
+        key = self._token_key(refresh_token)
+        
+        if not self.redis:
+            if key in self.active_sessions:
+                self.active_sessions[key]["is_active"] = False
+            return
+        
+        await self.redis.delete(key)
     
     async def revoke_all_sessions(self, company_id: int) -> None:
         """Revoke all sessions for a user"""
-        for session_data in self.active_sessions.values():
-            if session_data["company_id"] == company_id:
-                session_data["is_active"] = False
+        if not self.redis:
+            for key in self._sessions_by_company.pop(company_id, ()):
+                session_data = self.active_sessions.get(key)
+                if session_data:
+                    session_data["is_active"] = False
+            return
+        
+        await self._revoke_all_script(keys=[self._company_key(company_id)])
 
 # Global session manager instance
-session_manager = SessionManager()
\ No newline at end of file
+session_manager = SessionManager()
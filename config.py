@@ -25,12 +25,17 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = os.getenv("JWT_ALGORITHM", "HS256")
     JWT_ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("JWT_ACCESS_TOKEN_EXPIRE_MINUTES", 60))
     JWT_REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("JWT_REFRESH_TOKEN_EXPIRE_DAYS", 30))
+    JWT_VERIFY_CACHE_TTL: int = int(os.getenv("JWT_VERIFY_CACHE_TTL", 5))  # seconds
     
     # Database Settings
     DATABASE_URL: str = os.getenv("DATABASE_URL", "")
-    DATABASE_POOL_MIN_SIZE: int = int(os.getenv("DATABASE_POOL_MIN_SIZE", 5))
-    DATABASE_POOL_MAX_SIZE: int = int(os.getenv("DATABASE_POOL_MAX_SIZE", 20))
+    DATABASE_POOL_MIN_SIZE: int = int(os.getenv("DATABASE_POOL_MIN_SIZE", 10))
+    DATABASE_POOL_MAX_SIZE: int = int(os.getenv("DATABASE_POOL_MAX_SIZE", 50))
+    DATABASE_POOL_PREWARM: bool = os.getenv("DATABASE_POOL_PREWARM", "false").lower() == "true"  # open max_size connections at startup
+    DATABASE_POOL_MAX_INACTIVE_LIFETIME: float = float(os.getenv("DATABASE_POOL_MAX_INACTIVE_LIFETIME", 600))
     DATABASE_TIMEOUT: int = int(os.getenv("DATABASE_TIMEOUT", 60))
+    DATABASE_RESERVED_CONNECTIONS: int = int(os.getenv("DATABASE_RESERVED_CONNECTIONS", 5))  # kept free for admin/migrations
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", 1))  # app worker processes sharing the database
     
     # Redis Settings (for caching and background tasks)
     REDIS_URL: str = os.getenv("REDIS_URL", "redis://localhost:6379")
@@ -4,32 +4,375 @@ BlackFang Intelligence - Database Configuration and Utilities
 
 import asyncio
 import logging
-from typing import Optional
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
 import asyncpg
+import orjson
 from asyncpg import Pool
+from asyncpg.prepared_stmt import PreparedStatement
 from config import settings
 from auth import AuthManager
 
 # Global database pool
 db_pool: Optional[Pool] = None
 
+# Dedicated connection for LISTEN, kept outside the pool
+listener_conn: Optional[asyncpg.Connection] = None
+
+# Background index build started by init_database
+index_task: Optional[asyncio.Task] = None
+
+# Pool bounds actually used, reported by check_database_health
+pool_limits: Dict[str, int] = {}
+
+# Channel notified by the companies update trigger (payload: company id)
+COMPANIES_CHANGED_CHANNEL = "companies_changed"
+
 logger = logging.getLogger(__name__)
 
+# Full schema, sent to the server as a single multi-statement batch
+SCHEMA_DDL = f"""
+    -- Enumerated status columns (CREATE TYPE has no IF NOT EXISTS)
+    DO $$
+    BEGIN
+        CREATE TYPE threat_level_t AS ENUM ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL');
+    EXCEPTION WHEN duplicate_object THEN NULL;
+    END $$;
+
+    DO $$
+    BEGIN
+        CREATE TYPE alert_severity_t AS ENUM ('LOW', 'MEDIUM', 'HIGH', 'CRITICAL');
+    EXCEPTION WHEN duplicate_object THEN NULL;
+    END $$;
+
+    DO $$
+    BEGIN
+        CREATE TYPE monitoring_status_t AS ENUM ('active', 'paused', 'inactive');
+    EXCEPTION WHEN duplicate_object THEN NULL;
+    END $$;
+
+    -- Companies table
+    CREATE TABLE IF NOT EXISTS companies (
+        id SERIAL PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        email VARCHAR(255) UNIQUE NOT NULL,
+        password_hash VARCHAR(255) NOT NULL,
+        company_name VARCHAR(255),
+        industry VARCHAR(100),
+        subscription_plan VARCHAR(50) DEFAULT 'professional',
+        monthly_fee INTEGER DEFAULT 45000,
+        is_active BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Notify listeners (e.g. the /me cache) when a company row changes or is deleted
+    CREATE OR REPLACE FUNCTION notify_companies_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{COMPANIES_CHANGED_CHANNEL}', OLD.id::text);
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    -- Login only touches updated_at, so updates notify just when a cached column changes.
+    -- Triggers are created once (an unconditional companies_changed from older schemas
+    -- is replaced) rather than dropped and recreated under ACCESS EXCLUSIVE every startup.
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_trigger
+            WHERE tgrelid = 'companies'::regclass AND tgname = 'companies_changed' AND tgqual IS NOT NULL
+        ) THEN
+            DROP TRIGGER IF EXISTS companies_changed ON companies;
+            CREATE TRIGGER companies_changed
+                AFTER UPDATE ON companies
+                FOR EACH ROW
+                WHEN (
+                    (OLD.name, OLD.email, OLD.password_hash, OLD.company_name, OLD.industry,
+                     OLD.subscription_plan, OLD.monthly_fee, OLD.is_active)
+                    IS DISTINCT FROM
+                    (NEW.name, NEW.email, NEW.password_hash, NEW.company_name, NEW.industry,
+                     NEW.subscription_plan, NEW.monthly_fee, NEW.is_active)
+                )
+                EXECUTE FUNCTION notify_companies_changed();
+        END IF;
+
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_trigger
+            WHERE tgrelid = 'companies'::regclass AND tgname = 'companies_deleted'
+        ) THEN
+            CREATE TRIGGER companies_deleted
+                AFTER DELETE ON companies
+                FOR EACH ROW EXECUTE FUNCTION notify_companies_changed();
+        END IF;
+    END $$;
+
+    -- Competitors table
+    CREATE TABLE IF NOT EXISTS competitors (
+        id SERIAL PRIMARY KEY,
+        company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
+        name VARCHAR(255) NOT NULL,
+        website VARCHAR(500) NOT NULL,
+        industry VARCHAR(100),
+        location VARCHAR(255),
+        threat_level threat_level_t DEFAULT 'MEDIUM',
+        priority INTEGER DEFAULT 1,
+        monitoring_status monitoring_status_t DEFAULT 'active',
+        last_scraped TIMESTAMP,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(company_id, website)
+    );
+
+    -- Alerts table
+    CREATE TABLE IF NOT EXISTS alerts (
+        id SERIAL PRIMARY KEY,
+        company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
+        competitor_id INTEGER REFERENCES competitors(id) ON DELETE CASCADE,
+        alert_type VARCHAR(100) NOT NULL,
+        severity alert_severity_t NOT NULL,
+        title VARCHAR(255) NOT NULL,
+        message TEXT NOT NULL,
+        recommendation TEXT,
+        confidence_score SMALLINT DEFAULT 8500,  -- basis points, 0-10000
+        is_read BOOLEAN DEFAULT FALSE,
+        is_archived BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Scraping data table
+    CREATE TABLE IF NOT EXISTS scraping_data (
+        id SERIAL PRIMARY KEY,
+        competitor_id INTEGER REFERENCES competitors(id) ON DELETE CASCADE,
+        data_type VARCHAR(50) NOT NULL,
+        raw_data JSONB NOT NULL,
+        processed_insights JSONB,
+        scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- Reports table
+    CREATE TABLE IF NOT EXISTS reports (
+        id SERIAL PRIMARY KEY,
+        company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
+        title VARCHAR(255) NOT NULL,
+        report_type VARCHAR(100) NOT NULL,
+        content JSONB NOT NULL,
+        file_path VARCHAR(500),
+        file_size INTEGER,
+        download_count INTEGER DEFAULT 0,
+        generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    -- User sessions table for refresh tokens
+    CREATE TABLE IF NOT EXISTS user_sessions (
+        id SERIAL PRIMARY KEY,
+        company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
+        refresh_token VARCHAR(255) UNIQUE NOT NULL,
+        expires_at TIMESTAMP NOT NULL,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        is_active BOOLEAN DEFAULT TRUE
+    );
+
+    -- API keys table for external integrations
+    CREATE TABLE IF NOT EXISTS api_keys (
+        id SERIAL PRIMARY KEY,
+        company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
+        key_name VARCHAR(100) NOT NULL,
+        api_key VARCHAR(255) UNIQUE NOT NULL,
+        is_active BOOLEAN DEFAULT TRUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used TIMESTAMP,
+        UNIQUE(company_id, key_name)
+    );
+
+    -- Convert columns created with older types by earlier releases
+    DO $$
+    BEGIN
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'competitors' AND column_name = 'threat_level') = 'character varying' THEN
+            ALTER TABLE competitors ALTER COLUMN threat_level DROP DEFAULT;
+            ALTER TABLE competitors ALTER COLUMN threat_level TYPE threat_level_t USING threat_level::threat_level_t;
+            ALTER TABLE competitors ALTER COLUMN threat_level SET DEFAULT 'MEDIUM';
+        END IF;
+
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'competitors' AND column_name = 'monitoring_status') = 'character varying' THEN
+            ALTER TABLE competitors ALTER COLUMN monitoring_status DROP DEFAULT;
+            ALTER TABLE competitors ALTER COLUMN monitoring_status TYPE monitoring_status_t USING monitoring_status::monitoring_status_t;
+            ALTER TABLE competitors ALTER COLUMN monitoring_status SET DEFAULT 'active';
+        END IF;
+
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'alerts' AND column_name = 'severity') = 'character varying' THEN
+            ALTER TABLE alerts ALTER COLUMN severity TYPE alert_severity_t USING severity::alert_severity_t;
+        END IF;
+
+        IF (SELECT data_type FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'alerts' AND column_name = 'confidence_score') = 'numeric' THEN
+            ALTER TABLE alerts ALTER COLUMN confidence_score DROP DEFAULT;
+            ALTER TABLE alerts ALTER COLUMN confidence_score TYPE SMALLINT USING round(confidence_score * 10000);
+            ALTER TABLE alerts ALTER COLUMN confidence_score SET DEFAULT 8500;
+        END IF;
+    END $$;
+
+    -- Alerts as the API sees them, with confidence_score back on the 0-1 scale
+    CREATE OR REPLACE VIEW alerts_api AS
+        SELECT id, company_id, competitor_id, alert_type, severity, title, message,
+               recommendation, confidence_score::float8 / 10000 AS confidence_score,
+               is_read, is_archived, created_at, updated_at
+        FROM alerts;
+"""
+
+# Index maintenance, run one statement at a time after startup
+# (CONCURRENTLY builds online but cannot run inside a transaction or batch)
+INDEX_STATEMENTS = [
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_competitors_company_id ON competitors(company_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_competitors_company_priority ON competitors(company_id, priority ASC, threat_level DESC)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_competitors_threat_level ON competitors(threat_level)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_competitors_monitoring_status ON competitors(monitoring_status)",
+
+    # Per-company alert feeds filter on company_id and sort by created_at
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_alerts_company_id",
+    "DROP INDEX CONCURRENTLY IF EXISTS idx_alerts_created_at",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_company_created_id ON alerts(company_id, created_at DESC, id DESC)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_unread ON alerts(company_id, created_at DESC) WHERE is_read = FALSE AND is_archived = FALSE",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_competitor_id ON alerts(competitor_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_severity ON alerts(severity)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_is_read ON alerts(is_read)",
+
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_scraping_data_competitor_id ON scraping_data(competitor_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_scraping_data_scraped_at ON scraping_data(scraped_at DESC)",
+
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reports_company_id ON reports(company_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reports_generated_at ON reports(generated_at DESC)",
+
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_company_id ON user_sessions(company_id)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_refresh_token ON user_sessions(refresh_token)",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_user_sessions_expires_at ON user_sessions(expires_at)",
+]
+
+class PreparedConnection(asyncpg.Connection):
+    """Pooled connection that keeps hot statements prepared for its lifetime"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._hot_statements: Dict[str, PreparedStatement] = {}
+    
+    async def prepared(self, query: str) -> PreparedStatement:
+        """
+        Get prepared statement for query, preparing it on first use
+        
+        Args:
+            query: SQL query text
+            
+        Returns:
+            Prepared statement bound to this connection
+        """
+        statement = self._hot_statements.get(query)
+        if statement is None:
+            statement = await self.prepare(query)
+            self._hot_statements[query] = statement
+        return statement
+    
+    async def reset(self, *, timeout: Optional[float] = None) -> None:
+        """
+        Reset connection state on release back to the pool
+        
+        Pooled code never changes session settings or takes advisory locks, so
+        the RESET ALL / UNLISTEN round trip is skipped for clean connections.
+        The full reset still runs when a transaction was left open (including
+        one started by Transaction but not yet sent) or listeners were added,
+        so rollback and listener cleanup are never lost.
+        """
+        if (
+            self.is_in_transaction()
+            or self._top_xact is not None
+            or self._listeners
+            or self._log_listeners
+        ):
+            await super().reset(timeout=timeout)
+
+def _encode_json(value) -> str:
+    return orjson.dumps(value).decode()
+
+async def init_connection(conn: asyncpg.Connection) -> None:
+    """Register orjson codecs so JSON columns map straight to Python objects"""
+    for type_name in ("json", "jsonb"):
+        await conn.set_type_codec(
+            type_name,
+            encoder=_encode_json,
+            decoder=orjson.loads,
+            schema="pg_catalog"
+        )
+
+async def compute_pool_limits() -> Tuple[int, int]:
+    """
+    Bound the configured pool size by the server's connection limit
+    
+    Every worker process holds its own pool, so each gets an equal share of
+    max_connections after the reserved connections are set aside.
+    
+    Returns:
+        Tuple of (min_size, max_size) for this worker's pool
+    """
+    bootstrap = await asyncpg.connect(settings.DATABASE_URL)
+    try:
+        server_max = int(await bootstrap.fetchval("SHOW max_connections"))
+    finally:
+        await bootstrap.close()
+    
+    workers = max(settings.WEB_CONCURRENCY, 1)
+    per_worker = max((server_max - settings.DATABASE_RESERVED_CONNECTIONS) // workers, 1)
+    max_size = min(settings.DATABASE_POOL_MAX_SIZE, per_worker)
+    # Pre-warming fills the pool up front so early requests skip connect/auth
+    min_size = max_size if settings.DATABASE_POOL_PREWARM else min(settings.DATABASE_POOL_MIN_SIZE, max_size)
+    
+    if max_size < settings.DATABASE_POOL_MAX_SIZE:
+        logger.warning(
+            "Database pool capped at %d connections per worker "
+            "(max_connections=%d, workers=%d)",
+            max_size, server_max, workers
+        )
+    if min_size * workers > 0.8 * server_max:
+        logger.warning(
+            "Idle pool connections (%d x %d workers) approach max_connections=%d",
+            min_size, workers, server_max
+        )
+    
+    pool_limits.update(
+        server_max_connections=server_max,
+        workers=workers,
+        min_size=min_size,
+        max_size=max_size
+    )
+    return min_size, max_size
+
 async def init_database() -> None:
     """Initialize database connection pool and create tables"""
-    global db_pool
+    global db_pool, index_task
     
     if not settings.DATABASE_URL:
         logger.warning("No DATABASE_URL provided - running in demo mode")
         return
     
     try:
-        # Create connection pool
+        # Create connection pool sized against the server limit
+        min_size, max_size = await compute_pool_limits()
         db_pool = await asyncpg.create_pool(
             settings.DATABASE_URL,
-            min_size=settings.DATABASE_POOL_MIN_SIZE,
-            max_size=settings.DATABASE_POOL_MAX_SIZE,
-            command_timeout=settings.DATABASE_TIMEOUT
+            min_size=min_size,
+            max_size=max_size,
+            command_timeout=settings.DATABASE_TIMEOUT,
+            max_inactive_connection_lifetime=settings.DATABASE_POOL_MAX_INACTIVE_LIFETIME,
+            connection_class=PreparedConnection,
+            init=init_connection,
+            statement_cache_size=1024,
+            max_cached_statement_lifetime=0,
+            # Short OLTP queries only; JIT compilation costs more than it saves
+            server_settings={"jit": "off"}
         )
         
         logger.info("✅ Database connection pool created")
@@ -40,15 +383,46 @@ async def init_database() -> None:
         # Create demo data
         await create_demo_data()
         
+        # Build indexes online without holding up startup
+        index_task = asyncio.create_task(ensure_indexes())
+        
         logger.info("✅ Database initialized successfully")
         
     except Exception as e:
-        logger.error(f"❌ Database initialization failed: {e}")
+        logger.error("❌ Database initialization failed: %s", e)
         raise
 
+async def listen_company_changes(callback: Callable[[int], None]) -> None:
+    """
+    Subscribe to company row changes
+    
+    Args:
+        callback: Called with the company ID whenever a companies row is updated or deleted
+    """
+    global listener_conn
+    
+    if not db_pool:
+        return
+    
+    if listener_conn is None:
+        listener_conn = await asyncpg.connect(settings.DATABASE_URL)
+    
+    await listener_conn.add_listener(
+        COMPANIES_CHANGED_CHANNEL,
+        lambda conn, pid, channel, payload: callback(int(payload))
+    )
+
 async def close_database() -> None:
     """Close database connection pool"""
-    global db_pool
+    global db_pool, listener_conn, index_task
+    
+    if index_task and not index_task.done():
+        index_task.cancel()
+    index_task = None
+    
+    if listener_conn:
+        await listener_conn.close()
+        listener_conn = None
     
     if db_pool:
         await db_pool.close()
@@ -60,428 +434,421 @@ async def create_tables() -> None:
     if not db_pool:
         return
     
+    # One round trip for the whole schema; any failure rolls all of it back
     async with db_pool.acquire() as conn:
-        # Companies table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS companies (
-                id SERIAL PRIMARY KEY,
-                name VARCHAR(255) NOT NULL,
-                email VARCHAR(255) UNIQUE NOT NULL,
-                password_hash VARCHAR(255) NOT NULL,
-                company_name VARCHAR(255),
-                industry VARCHAR(100),
-                subscription_plan VARCHAR(50) DEFAULT 'professional',
-                monthly_fee INTEGER DEFAULT 45000,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Competitors table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS competitors (
-                id SERIAL PRIMARY KEY,
-                company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
-                name VARCHAR(255) NOT NULL,
-                website VARCHAR(500) NOT NULL,
-                industry VARCHAR(100),
-                location VARCHAR(255),
-                threat_level VARCHAR(20) DEFAULT 'MEDIUM',
-                priority INTEGER DEFAULT 1,
-                monitoring_status VARCHAR(20) DEFAULT 'active',
-                last_scraped TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(company_id, website)
-            )
-        """)
-        
-        # Alerts table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS alerts (
-                id SERIAL PRIMARY KEY,
-                company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
-                competitor_id INTEGER REFERENCES competitors(id) ON DELETE CASCADE,
-                alert_type VARCHAR(100) NOT NULL,
-                severity VARCHAR(20) NOT NULL,
-                title VARCHAR(255) NOT NULL,
-                message TEXT NOT NULL,
-                recommendation TEXT,
-                confidence_score DECIMAL(3,2) DEFAULT 0.85,
-                is_read BOOLEAN DEFAULT FALSE,
-                is_archived BOOLEAN DEFAULT FALSE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Scraping data table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS scraping_data (
-                id SERIAL PRIMARY KEY,
-                competitor_id INTEGER REFERENCES competitors(id) ON DELETE CASCADE,
-                data_type VARCHAR(50) NOT NULL,
-                raw_data JSONB NOT NULL,
-                processed_insights JSONB,
-                scraped_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # Reports table
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS reports (
-                id SERIAL PRIMARY KEY,
-                company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
-                title VARCHAR(255) NOT NULL,
-                report_type VARCHAR(100) NOT NULL,
-                content JSONB NOT NULL,
-                file_path VARCHAR(500),
-                file_size INTEGER,
-                download_count INTEGER DEFAULT 0,
-                generated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        # User sessions table for refresh tokens
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS user_sessions (
-                id SERIAL PRIMARY KEY,
-                company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
-                refresh_token VARCHAR(255) UNIQUE NOT NULL,
-                expires_at TIMESTAMP NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                is_active BOOLEAN DEFAULT TRUE
-            )
-        """)
-        
-        # API keys table for external integrations
-        await conn.execute("""
-            CREATE TABLE IF NOT EXISTS api_keys (
-                id SERIAL PRIMARY KEY,
-                company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
-                key_name VARCHAR(100) NOT NULL,
-                api_key VARCHAR(255) UNIQUE NOT NULL,
-                is_active BOOLEAN DEFAULT TRUE,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_used TIMESTAMP,
-                UNIQUE(company_id, key_name)
-            )
-        """)
-        
-        # Create indexes for performance
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_competitors_company_id ON competitors(company_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_competitors_threat_level ON competitors(threat_level)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_competitors_monitoring_status ON competitors(monitoring_status)")
-        
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_company_id ON alerts(company_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_competitor_id ON alerts(competitor_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_severity ON alerts(severity)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts(created_at DESC)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_is_read ON alerts(is_read)")
-        
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_scraping_data_competitor_id ON scraping_data(competitor_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_scraping_data_scraped_at ON scraping_data(scraped_at DESC)")
-        
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_company_id ON reports(company_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_generated_at ON reports(generated_at DESC)")
-        
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_user_sessions_company_id ON user_sessions(company_id)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_user_sessions_refresh_token ON user_sessions(refresh_token)")
-        await conn.execute("CREATE INDEX IF NOT EXISTS idx_user_sessions_expires_at ON user_sessions(expires_at)")
+        async with conn.transaction():
+            await conn.execute(SCHEMA_DDL)
+
+async def ensure_indexes() -> None:
+    """Create (and retire) indexes concurrently so tables stay writable"""
+    if not db_pool:
+        return
+    
+    async with db_pool.acquire() as conn:
+        for statement in INDEX_STATEMENTS:
+            try:
+                await conn.execute(statement)
+            except asyncpg.PostgresError as e:
+                # A failed concurrent build leaves an INVALID index; drop it by hand and restart
+                logger.warning("Index statement failed: %s (%s)", statement, e)
+    
+    logger.info("✅ Database indexes ensured")
 
 async def create_demo_data() -> None:
     """Create comprehensive demo data for client demonstrations"""
     if not db_pool:
         return
     
+    auth_manager = AuthManager()
+    password_hash = auth_manager.hash_password(settings.DEMO_PASSWORD)
+    
     async with db_pool.acquire() as conn:
-        # Check if demo company already exists
-        existing = await conn.fetchrow(
-            "SELECT id FROM companies WHERE email = $1", 
-            settings.DEMO_EMAIL
-        )
-        if existing:
-            return
-        
-        auth_manager = AuthManager()
-        password_hash = auth_manager.hash_password(settings.DEMO_PASSWORD)
-        
-        # Create demo company
-        company_id = await conn.fetchval("""
-            INSERT INTO companies (
-                name, email, password_hash, company_name, 
-                industry, subscription_plan, monthly_fee
-            ) VALUES ($1, $2, $3, $4, $5, $6, $7) 
-            RETURNING id
-        """, 
-            'Demo Automotive Dealership',
-            settings.DEMO_EMAIL, 
-            password_hash,
-            'Demo Motors Pvt Ltd', 
-            'Automotive', 
-            'professional', 
-            45000
-        )
-        
-        # Create demo competitors
-        competitors_data = [
-            {
-                'name': 'AutoMax Dealers',
-                'website': 'https://cars24.com',
-                'industry': 'Automotive',
-                'location': 'Mumbai, Maharashtra',
-                'threat_level': 'HIGH',
-                'priority': 1
-            },
-            {
-                'name': 'Speed Motors',
-                'website': 'https://carwale.com',
-                'industry': 'Automotive', 
-                'location': 'Delhi, NCR',
-                'threat_level': 'MEDIUM',
-                'priority': 2
-            },
-            {
-                'name': 'Elite Auto Solutions',
-                'website': 'https://cardekho.com',
-                'industry': 'Automotive',
-                'location': 'Bangalore, Karnataka', 
-                'threat_level': 'LOW',
-                'priority': 3
-            }
-        ]
-        
-        competitor_ids = []
-        for comp_data in competitors_data:
-            comp_id = await conn.fetchval("""
+        # One transaction: a single commit, and no half-seeded demo account
+        async with conn.transaction():
+            # Demo rows are reproducible, so don't wait on the WAL flush at commit
+            await conn.execute("SET LOCAL synchronous_commit = off")
+            
+            # Create demo company; a concurrent or earlier seed wins the conflict
+            company_id = await conn.fetchval("""
+                INSERT INTO companies (
+                    name, email, password_hash, company_name, 
+                    industry, subscription_plan, monthly_fee
+                ) VALUES ($1, $2, $3, $4, $5, $6, $7) 
+                ON CONFLICT (email) DO NOTHING
+                RETURNING id
+            """, 
+                'Demo Automotive Dealership',
+                settings.DEMO_EMAIL, 
+                password_hash,
+                'Demo Motors Pvt Ltd', 
+                'Automotive', 
+                'professional', 
+                45000
+            )
+            if company_id is None:
+                return
+            
+            # Create demo competitors
+            competitors_data = [
+                {
+                    'name': 'AutoMax Dealers',
+                    'website': 'https://cars24.com',
+                    'industry': 'Automotive',
+                    'location': 'Mumbai, Maharashtra',
+                    'threat_level': 'HIGH',
+                    'priority': 1
+                },
+                {
+                    'name': 'Speed Motors',
+                    'website': 'https://carwale.com',
+                    'industry': 'Automotive', 
+                    'location': 'Delhi, NCR',
+                    'threat_level': 'MEDIUM',
+                    'priority': 2
+                },
+                {
+                    'name': 'Elite Auto Solutions',
+                    'website': 'https://cardekho.com',
+                    'industry': 'Automotive',
+                    'location': 'Bangalore, Karnataka', 
+                    'threat_level': 'LOW',
+                    'priority': 3
+                }
+            ]
+            
+            # All competitors in one multi-row INSERT; ids are mapped back by website
+            # since RETURNING order is not guaranteed to follow VALUES order
+            competitor_columns = 9
+            values_sql = ", ".join(
+                "(" + ", ".join(f"${row * competitor_columns + col + 1}" for col in range(competitor_columns)) + ")"
+                for row in range(len(competitors_data))
+            )
+            competitor_params = []
+            for comp_data in competitors_data:
+                competitor_params.extend((
+                    company_id,
+                    comp_data['name'],
+                    comp_data['website'],
+                    comp_data['industry'],
+                    comp_data['location'],
+                    comp_data['threat_level'],
+                    comp_data['priority'],
+                    'active',
+                    datetime.utcnow()
+                ))
+            
+            inserted = await conn.fetch(f"""
                 INSERT INTO competitors (
                     company_id, name, website, industry, location,
                     threat_level, priority, monitoring_status, last_scraped
-                ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8, $9) 
-                RETURNING id
-            """,
-                company_id,
-                comp_data['name'],
-                comp_data['website'],
-                comp_data['industry'],
-                comp_data['location'],
-                comp_data['threat_level'],
-                comp_data['priority'],
-                'active',
-                asyncio.get_event_loop().time()
-            )
-            competitor_ids.append(comp_id)
-        
-        # Create realistic alerts with strategic recommendations
-        alerts_data = [
-            {
-                'competitor_id': competitor_ids[0],
-                'alert_type': 'PRICE_DROP',
-                'severity': 'HIGH',
-                'title': '🔴 CRITICAL: Major Price War Detected - AutoMax Dealers',
-                'message': 'AutoMax Dealers implemented aggressive 8% price reduction on Honda City models (₹95,000 decrease). Market share impact imminent within 48 hours. Competitive analysis shows this is part of Q4 market expansion strategy.',
-                'recommendation': 'IMMEDIATE ACTION REQUIRED: (1) Consider price matching within 24 hours, OR (2) Launch "Premium Service Value" campaign highlighting superior warranty, service quality, and customer support. (3) Activate loyalty program for existing customers. (4) Prepare inventory management for increased demand.',
-                'confidence_score': 0.95
-            },
-            {
-                'competitor_id': competitor_ids[1],
-                'alert_type': 'NEW_PROMOTION',
-                'severity': 'MEDIUM',
-                'title': '🟡 STRATEGIC ALERT: Comprehensive Marketing Campaign - Speed Motors',
-                'message': 'Speed Motors launched multi-channel "Monsoon Festival Special" campaign: 5% additional discount + Free comprehensive insurance + Extended warranty + Zero processing fees. Digital ad spend increased 40% across Facebook, Google, and Instagram.',
-                'recommendation': 'STRATEGIC RESPONSE WITHIN 72 HOURS: (1) Deploy "Exclusive Client Benefits" package with comparable or superior value proposition. (2) Leverage social media with customer testimonials. (3) Consider partnership with insurance providers for competitive offering. (4) Activate email marketing to warm leads.',
-                'confidence_score': 0.87
-            },
-            {
-                'competitor_id': competitor_ids[2],
-                'alert_type': 'REPUTATION_ISSUE',
-                'severity': 'MEDIUM',
-                'title': '🟡 MARKET OPPORTUNITY: Service Quality Issues - Elite Auto',
-                'message': 'Elite Auto Solutions received 4 negative reviews (Google: 2, Facebook: 1, Justdial: 1) in past 48 hours citing delivery delays (avg 3 weeks vs promised 1 week), poor after-sales support response times, and parts availability issues. Customer sentiment analysis shows -15% decline.',
-                'recommendation': 'COMPETITIVE ADVANTAGE OPPORTUNITY: (1) Launch "Guaranteed Delivery Timeline" campaign with penalty clause for delays. (2) Promote superior after-sales service with same-day response guarantee. (3) Target their dissatisfied customers with "Satisfaction Guarantee" program. (4) Create comparison content highlighting service reliability.',
-                'confidence_score': 0.91
-            },
-            {
-                'competitor_id': competitor_ids[0],
-                'alert_type': 'CONTENT_CHANGE',
-                'severity': 'LOW',
-                'title': '🔵 INTELLIGENCE UPDATE: Inventory Strategy Shift - AutoMax',
-                'message': 'AutoMax Dealers updated website with 23% increase in premium SUV listings over past 7 days. New featured categories include luxury segment vehicles. Price positioning suggests targeting higher-income demographics.',
-                'recommendation': 'STRATEGIC PREPARATION: (1) Review current SUV inventory levels and pricing strategy. (2) Analyze customer data for luxury segment demand in your market. (3) Consider expanding premium vehicle offerings if market data supports. (4) Prepare competitive pricing analysis for luxury segment.',
-                'confidence_score': 0.78
-            },
-            {
-                'competitor_id': competitor_ids[1],
-                'alert_type': 'TRAFFIC_CHANGE',
-                'severity': 'LOW',
-                'title': '🔵 MONITORING: Enhanced Digital Presence - Speed Motors',
-                'message': 'Speed Motors expanded digital marketing footprint: 40% increase in social media advertising spend, new video marketing campaign launched, website traffic up 25% (estimated). Enhanced SEO efforts detected with new content strategy.',
-                'recommendation': 'DIGITAL STRATEGY EVALUATION: (1) Assess current digital marketing budget allocation vs competition. (2) Consider enhanced social media engagement strategy. (3) Evaluate video marketing opportunities for showroom tours, customer testimonials. (4) Review SEO strategy and content calendar.',
-                'confidence_score': 0.82
-            },
-            {
-                'competitor_id': competitor_ids[2],
-                'alert_type': 'NEW_PRODUCT',
-                'severity': 'MEDIUM',
-                'title': '🟡 PRODUCT ALERT: Extended Warranty Program - Elite Auto',
-                'message': 'Elite Auto Solutions introduced "Total Care Protection" - 5-year extended warranty program with roadside assistance, free annual maintenance, and replacement guarantee. Marketed as premium value addition despite service quality issues.',
-                'recommendation': 'SERVICE DIFFERENTIATION OPPORTUNITY: (1) Develop superior warranty program highlighting proven service track record. (2) Create comparison chart showing service quality metrics vs competitors. (3) Bundle extended warranty with proven reliability message. (4) Target customers concerned about long-term service quality.',
-                'confidence_score': 0.89
-            }
-        ]
-        
-        for alert_data in alerts_data:
-            await conn.execute("""
+                ) VALUES {values_sql}
+                RETURNING id, website
+            """, *competitor_params)
+            ids_by_website = {row['website']: row['id'] for row in inserted}
+            competitor_ids = [ids_by_website[comp_data['website']] for comp_data in competitors_data]
+            
+            # Create realistic alerts with strategic recommendations
+            alerts_data = [
+                {
+                    'competitor_id': competitor_ids[0],
+                    'alert_type': 'PRICE_DROP',
+                    'severity': 'HIGH',
+                    'title': '🔴 CRITICAL: Major Price War Detected - AutoMax Dealers',
+                    'message': 'AutoMax Dealers implemented aggressive 8% price reduction on Honda City models (₹95,000 decrease). Market share impact imminent within 48 hours. Competitive analysis shows this is part of Q4 market expansion strategy.',
+                    'recommendation': 'IMMEDIATE ACTION REQUIRED: (1) Consider price matching within 24 hours, OR (2) Launch "Premium Service Value" campaign highlighting superior warranty, service quality, and customer support. (3) Activate loyalty program for existing customers. (4) Prepare inventory management for increased demand.',
+                    'confidence_score': 0.95
+                },
+                {
+                    'competitor_id': competitor_ids[1],
+                    'alert_type': 'NEW_PROMOTION',
+                    'severity': 'MEDIUM',
+                    'title': '🟡 STRATEGIC ALERT: Comprehensive Marketing Campaign - Speed Motors',
+                    'message': 'Speed Motors launched multi-channel "Monsoon Festival Special" campaign: 5% additional discount + Free comprehensive insurance + Extended warranty + Zero processing fees. Digital ad spend increased 40% across Facebook, Google, and Instagram.',
+                    'recommendation': 'STRATEGIC RESPONSE WITHIN 72 HOURS: (1) Deploy "Exclusive Client Benefits" package with comparable or superior value proposition. (2) Leverage social media with customer testimonials. (3) Consider partnership with insurance providers for competitive offering. (4) Activate email marketing to warm leads.',
+                    'confidence_score': 0.87
+                },
+                {
+                    'competitor_id': competitor_ids[2],
+                    'alert_type': 'REPUTATION_ISSUE',
+                    'severity': 'MEDIUM',
+                    'title': '🟡 MARKET OPPORTUNITY: Service Quality Issues - Elite Auto',
+                    'message': 'Elite Auto Solutions received 4 negative reviews (Google: 2, Facebook: 1, Justdial: 1) in past 48 hours citing delivery delays (avg 3 weeks vs promised 1 week), poor after-sales support response times, and parts availability issues. Customer sentiment analysis shows -15% decline.',
+                    'recommendation': 'COMPETITIVE ADVANTAGE OPPORTUNITY: (1) Launch "Guaranteed Delivery Timeline" campaign with penalty clause for delays. (2) Promote superior after-sales service with same-day response guarantee. (3) Target their dissatisfied customers with "Satisfaction Guarantee" program. (4) Create comparison content highlighting service reliability.',
+                    'confidence_score': 0.91
+                },
+                {
+                    'competitor_id': competitor_ids[0],
+                    'alert_type': 'CONTENT_CHANGE',
+                    'severity': 'LOW',
+                    'title': '🔵 INTELLIGENCE UPDATE: Inventory Strategy Shift - AutoMax',
+                    'message': 'AutoMax Dealers updated website with 23% increase in premium SUV listings over past 7 days. New featured categories include luxury segment vehicles. Price positioning suggests targeting higher-income demographics.',
+                    'recommendation': 'STRATEGIC PREPARATION: (1) Review current SUV inventory levels and pricing strategy. (2) Analyze customer data for luxury segment demand in your market. (3) Consider expanding premium vehicle offerings if market data supports. (4) Prepare competitive pricing analysis for luxury segment.',
+                    'confidence_score': 0.78
+                },
+                {
+                    'competitor_id': competitor_ids[1],
+                    'alert_type': 'TRAFFIC_CHANGE',
+                    'severity': 'LOW',
+                    'title': '🔵 MONITORING: Enhanced Digital Presence - Speed Motors',
+                    'message': 'Speed Motors expanded digital marketing footprint: 40% increase in social media advertising spend, new video marketing campaign launched, website traffic up 25% (estimated). Enhanced SEO efforts detected with new content strategy.',
+                    'recommendation': 'DIGITAL STRATEGY EVALUATION: (1) Assess current digital marketing budget allocation vs competition. (2) Consider enhanced social media engagement strategy. (3) Evaluate video marketing opportunities for showroom tours, customer testimonials. (4) Review SEO strategy and content calendar.',
+                    'confidence_score': 0.82
+                },
+                {
+                    'competitor_id': competitor_ids[2],
+                    'alert_type': 'NEW_PRODUCT',
+                    'severity': 'MEDIUM',
+                    'title': '🟡 PRODUCT ALERT: Extended Warranty Program - Elite Auto',
+                    'message': 'Elite Auto Solutions introduced "Total Care Protection" - 5-year extended warranty program with roadside assistance, free annual maintenance, and replacement guarantee. Marketed as premium value addition despite service quality issues.',
+                    'recommendation': 'SERVICE DIFFERENTIATION OPPORTUNITY: (1) Develop superior warranty program highlighting proven service track record. (2) Create comparison chart showing service quality metrics vs competitors. (3) Bundle extended warranty with proven reliability message. (4) Target customers concerned about long-term service quality.',
+                    'confidence_score': 0.89
+                }
+            ]
+            
+            await conn.executemany("""
                 INSERT INTO alerts (
                     company_id, competitor_id, alert_type, severity, title, 
                     message, recommendation, confidence_score
                 ) VALUES ($1, $2, $3, $4, $5, $6, $7, $8)
-            """,
-                company_id,
-                alert_data['competitor_id'],
-                alert_data['alert_type'],
-                alert_data['severity'],
-                alert_data['title'],
-                alert_data['message'],
-                alert_data['recommendation'],
-                alert_data['confidence_score']
-            )
-        
-        # Create sample scraping data
-        from datetime import datetime
-        import json
-        
-        scraping_samples = [
-            {
-                'competitor_id': competitor_ids[0],
-                'data_type': 'pricing_analysis',
-                'raw_data': {
-                    'vehicle_prices': [
-                        {
-                            'model': 'Honda City', 
-                            'current_price': 1105000,
-                            'previous_price': 1200000, 
-                            'change_percentage': -8.0,
-                            'change_amount': -95000
-                        },
-                        {
-                            'model': 'Honda Jazz',
-                            'current_price': 875000,
-                            'previous_price': 925000,
-                            'change_percentage': -5.4,
-                            'change_amount': -50000
-                        }
-                    ],
-                    'scraped_timestamp': datetime.utcnow().isoformat(),
-                    'scraping_success': True
-                },
-                'processed_insights': {
-                    'trend': 'aggressive_pricing_strategy',
-                    'market_impact': 'high',
-                    'response_urgency': 'immediate',
-                    'competitive_advantage': 'price_leadership',
-                    'risk_level': 'high'
-                }
-            },
-            {
-                'competitor_id': competitor_ids[1],
-                'data_type': 'promotional_analysis',
-                'raw_data': {
-                    'promotions_detected': [
-                        {
-                            'title': 'Monsoon Festival Special',
-                            'discount_percentage': 5,
-                            'additional_benefits': [
-                                'Free comprehensive insurance',
-                                'Extended warranty',
-                                'Zero processing fees'
-                            ],
-                            'validity': '30 days',
-                            'estimated_value': 75000
-                        }
-                    ],
-                    'digital_advertising': {
-                        'facebook_ad_spend_increase': '40%',
-                        'google_ads_active': True,
-                        'instagram_campaign': True
+            """, [
+                (
+                    company_id,
+                    alert_data['competitor_id'],
+                    alert_data['alert_type'],
+                    alert_data['severity'],
+                    alert_data['title'],
+                    alert_data['message'],
+                    alert_data['recommendation'],
+                    round(alert_data['confidence_score'] * 10000)
+                )
+                for alert_data in alerts_data
+            ])
+            
+            # Create sample scraping data
+            scraping_samples = [
+                {
+                    'competitor_id': competitor_ids[0],
+                    'data_type': 'pricing_analysis',
+                    'raw_data': {
+                        'vehicle_prices': [
+                            {
+                                'model': 'Honda City', 
+                                'current_price': 1105000,
+                                'previous_price': 1200000, 
+                                'change_percentage': -8.0,
+                                'change_amount': -95000
+                            },
+                            {
+                                'model': 'Honda Jazz',
+                                'current_price': 875000,
+                                'previous_price': 925000,
+                                'change_percentage': -5.4,
+                                'change_amount': -50000
+                            }
+                        ],
+                        'scraped_timestamp': datetime.utcnow().isoformat(),
+                        'scraping_success': True
                     },
-                    'scraped_timestamp': datetime.utcnow().isoformat()
+                    'processed_insights': {
+                        'trend': 'aggressive_pricing_strategy',
+                        'market_impact': 'high',
+                        'response_urgency': 'immediate',
+                        'competitive_advantage': 'price_leadership',
+                        'risk_level': 'high'
+                    }
                 },
-                'processed_insights': {
-                    'campaign_type': 'seasonal_promotion',
-                    'market_impact': 'medium',
-                    'response_urgency': 'moderate',
-                    'investment_level': 'significant',
-                    'duration': 'short_term'
+                {
+                    'competitor_id': competitor_ids[1],
+                    'data_type': 'promotional_analysis',
+                    'raw_data': {
+                        'promotions_detected': [
+                            {
+                                'title': 'Monsoon Festival Special',
+                                'discount_percentage': 5,
+                                'additional_benefits': [
+                                    'Free comprehensive insurance',
+                                    'Extended warranty',
+                                    'Zero processing fees'
+                                ],
+                                'validity': '30 days',
+                                'estimated_value': 75000
+                            }
+                        ],
+                        'digital_advertising': {
+                            'facebook_ad_spend_increase': '40%',
+                            'google_ads_active': True,
+                            'instagram_campaign': True
+                        },
+                        'scraped_timestamp': datetime.utcnow().isoformat()
+                    },
+                    'processed_insights': {
+                        'campaign_type': 'seasonal_promotion',
+                        'market_impact': 'medium',
+                        'response_urgency': 'moderate',
+                        'investment_level': 'significant',
+                        'duration': 'short_term'
+                    }
                 }
-            }
-        ]
-        
-        for scraping_data in scraping_samples:
-            await conn.execute("""
+            ]
+            
+            await conn.executemany("""
                 INSERT INTO scraping_data (
                     competitor_id, data_type, raw_data, processed_insights
                 ) VALUES ($1, $2, $3, $4)
-            """,
-                scraping_data['competitor_id'],
-                scraping_data['data_type'],
-                json.dumps(scraping_data['raw_data']),
-                json.dumps(scraping_data['processed_insights'])
-            )
-        
-        logger.info("✅ Demo data created with comprehensive automotive scenarios")
+            """, [
+                (
+                    scraping_data['competitor_id'],
+                    scraping_data['data_type'],
+                    scraping_data['raw_data'],
+                    scraping_data['processed_insights']
+                )
+                for scraping_data in scraping_samples
+            ])
+            
+            logger.info("✅ Demo data created with comprehensive automotive scenarios")
+
+# Recently fetched active companies: ("email", email) / ("id", id) -> (cache expiry, row)
+_COMPANY_CACHE: Dict[Tuple[str, Any], Tuple[float, asyncpg.Record]] = {}
+_COMPANY_CACHE_MAX_SIZE = 1024
+_COMPANY_CACHE_TTL = 30  # seconds
+
+def _cache_company(row: asyncpg.Record) -> None:
+    """Cache a company row under both its email and its id"""
+    expires_at = time.time() + _COMPANY_CACHE_TTL
+    for key in (("email", row['email']), ("id", row['id'])):
+        if len(_COMPANY_CACHE) >= _COMPANY_CACHE_MAX_SIZE:
+            _COMPANY_CACHE.pop(next(iter(_COMPANY_CACHE)))
+        _COMPANY_CACHE[key] = (expires_at, row)
+
+def _cached_company(key: Tuple[str, Any]) -> Optional[asyncpg.Record]:
+    cached = _COMPANY_CACHE.get(key)
+    if cached and cached[0] > time.time():
+        return cached[1]
+    return None
+
+def invalidate_company(company_id: int) -> None:
+    """Drop cached rows for a company (called on companies_changed notifications, including deletes)"""
+    cached = _COMPANY_CACHE.pop(("id", company_id), None)
+    if cached:
+        _COMPANY_CACHE.pop(("email", cached[1]['email']), None)
+
+# Hot getter queries, prepared once per pooled connection. Company rows are cached,
+# so password_hash is never selected here; credential checks query it directly.
+_COMPANY_COLUMNS = """
+    id, name, email, company_name, industry, subscription_plan,
+    monthly_fee, is_active, created_at, updated_at
+"""
+_COMPANY_BY_EMAIL_QUERY = f"SELECT {_COMPANY_COLUMNS} FROM companies WHERE email = $1 AND is_active = TRUE"
+_COMPANY_BY_ID_QUERY = f"SELECT {_COMPANY_COLUMNS} FROM companies WHERE id = $1 AND is_active = TRUE"
+_COMPETITORS_BY_COMPANY_QUERY = "SELECT * FROM competitors WHERE company_id = $1 ORDER BY priority ASC, threat_level DESC"
+_ALERTS_BY_COMPANY_QUERY = """
+    SELECT a.*, c.name as competitor_name, c.website as competitor_website
+    FROM alerts_api a
+    LEFT JOIN competitors c ON a.competitor_id = c.id
+    WHERE a.company_id = $1
+    ORDER BY a.created_at DESC, a.id DESC
+    LIMIT $2
+"""
+_ALERTS_BY_COMPANY_AFTER_QUERY = """
+    SELECT a.*, c.name as competitor_name, c.website as competitor_website
+    FROM alerts_api a
+    LEFT JOIN competitors c ON a.competitor_id = c.id
+    WHERE a.company_id = $1 AND (a.created_at, a.id) < ($3, $4)
+    ORDER BY a.created_at DESC, a.id DESC
+    LIMIT $2
+"""
 
 # Database utility functions
-async def get_company_by_email(email: str):
+@asynccontextmanager
+async def use_connection(conn: Optional[PreparedConnection] = None) -> AsyncIterator[PreparedConnection]:
+    """
+    Yield the caller's pooled connection, or acquire one for this call
+    
+    Lets a handler run several getters on one connection instead of taking
+    a pool slot per lookup.
+    """
+    if conn is not None:
+        yield conn
+    else:
+        async with db_pool.acquire() as pooled:
+            yield pooled
+
+async def get_company_by_email(email: str, conn: Optional[PreparedConnection] = None):
     """Get company by email"""
-    if not db_pool:
-        return None
+    company = _cached_company(("email", email))
+    if company is not None or (conn is None and not db_pool):
+        return company
         
-    async with db_pool.acquire() as conn:
-        return await conn.fetchrow(
-            "SELECT * FROM companies WHERE email = $1 AND is_active = TRUE",
-            email
-        )
+    async with use_connection(conn) as conn:
+        statement = await conn.prepared(_COMPANY_BY_EMAIL_QUERY)
+        company = await statement.fetchrow(email)
+    
+    if company is not None:
+        _cache_company(company)
+    return company
 
-async def get_company_by_id(company_id: int):
+async def get_company_by_id(company_id: int, conn: Optional[PreparedConnection] = None):
     """Get company by ID"""
-    if not db_pool:
-        return None
+    company = _cached_company(("id", company_id))
+    if company is not None or (conn is None and not db_pool):
+        return company
         
-    async with db_pool.acquire() as conn:
-        return await conn.fetchrow(
-            "SELECT * FROM companies WHERE id = $1 AND is_active = TRUE",
-            company_id
-        )
+    async with use_connection(conn) as conn:
+        statement = await conn.prepared(_COMPANY_BY_ID_QUERY)
+        company = await statement.fetchrow(company_id)
+    
+    if company is not None:
+        _cache_company(company)
+    return company
 
-async def get_competitors_by_company(company_id: int):
+async def get_competitors_by_company(company_id: int, conn: Optional[PreparedConnection] = None):
     """Get all competitors for a company"""
-    if not db_pool:
+    if conn is None and not db_pool:
         return []
         
-    async with db_pool.acquire() as conn:
-        return await conn.fetch(
-            "SELECT * FROM competitors WHERE company_id = $1 ORDER BY priority ASC, threat_level DESC",
-            company_id
-        )
+    async with use_connection(conn) as conn:
+        statement = await conn.prepared(_COMPETITORS_BY_COMPANY_QUERY)
+        return await statement.fetch(company_id)
 
-async def get_alerts_by_company(company_id: int, limit: int = 50, offset: int = 0):
-    """Get alerts for a company with pagination"""
-    if not db_pool:
-        return []
+async def get_alerts_by_company(
+    company_id: int,
+    limit: int = 50,
+    cursor: Optional[Tuple[datetime, int]] = None,
+    conn: Optional[PreparedConnection] = None
+) -> Tuple[List[asyncpg.Record], Optional[Tuple[datetime, int]]]:
+    """
+    Get alerts for a company, newest first, with keyset pagination
+    
+    Args:
+        company_id: Company whose alerts to fetch
+        limit: Maximum number of alerts to return
+        cursor: (created_at, id) of the last alert on the previous page
+        conn: Pooled connection to reuse; one is acquired if omitted
         
-    async with db_pool.acquire() as conn:
-        return await conn.fetch("""
-            SELECT a.*, c.name as competitor_name, c.website as competitor_website
-            FROM alerts a
-            LEFT JOIN competitors c ON a.competitor_id = c.id
-            WHERE a.company_id = $1
-            ORDER BY a.created_at DESC
-            LIMIT $2 OFFSET $3
-        """, company_id, limit, offset)
+    Returns:
+        Tuple of (alerts, cursor for the next page or None on the last page)
+    """
+    if conn is None and not db_pool:
+        return [], None
+        
+    async with use_connection(conn) as conn:
+        if cursor is None:
+            statement = await conn.prepared(_ALERTS_BY_COMPANY_QUERY)
+            rows = await statement.fetch(company_id, limit)
+        else:
+            statement = await conn.prepared(_ALERTS_BY_COMPANY_AFTER_QUERY)
+            rows = await statement.fetch(company_id, limit, *cursor)
+    
+    next_cursor = (rows[-1]['created_at'], rows[-1]['id']) if len(rows) == limit else None
+    return rows, next_cursor
 
 # Health check function
+_HEALTH_CHECK_QUERY = """
+    SELECT 1 AS ping,
+           (SELECT count(*) FROM pg_catalog.pg_class
+            WHERE relkind = 'r' AND relnamespace = 'public'::regnamespace) AS tables
+"""
+
 async def check_database_health() -> dict:
     """Check database connectivity and performance"""
     if not db_pool:
@@ -489,25 +856,20 @@ async def check_database_health() -> dict:
     
     try:
         async with db_pool.acquire() as conn:
-            # Test basic connectivity
-            result = await conn.fetchval("SELECT 1")
-            
-            # Test table existence
-            tables = await conn.fetch("""
-                SELECT table_name FROM information_schema.tables 
-                WHERE table_schema = 'public'
-            """)
+            # Connectivity and table count in a single round trip
+            row = await conn.fetchrow(_HEALTH_CHECK_QUERY)
             
             # Get pool statistics
             pool_stats = {
                 "size": db_pool.get_size(),
                 "idle": db_pool.get_idle_size(),
-                "used": db_pool.get_size() - db_pool.get_idle_size()
+                "used": db_pool.get_size() - db_pool.get_idle_size(),
+                **pool_limits
             }
             
             return {
                 "status": "healthy",
-                "tables_count": len(tables),
+                "tables_count": row['tables'],
                 "pool_stats": pool_stats,
                 "connection_test": "passed"
             }
@@ -9,19 +9,22 @@ import os
 import asyncio
 import logging
 import hashlib
+import hmac
 import secrets
 import jwt
 from datetime import datetime, timedelta
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
 import json
 import re
+from html import unescape
 
 # FastAPI and async imports
 from fastapi import FastAPI, HTTPException, Depends, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
 import uvicorn
 
 # Database imports
@@ -30,8 +33,15 @@ from asyncpg import Pool
 
 # Web scraping imports  
 import aiohttp
-from bs4 import BeautifulSoup
+
+# aiodns (optional) resolves on the event loop; aiohttp's threaded resolver is the fallback
+try:
+    import aiodns  # noqa: F401
+    HAS_AIODNS = True
+except ImportError:
+    HAS_AIODNS = False
 import random
+from itertools import cycle
 
 # Configuration
 logging.basicConfig(
@@ -48,6 +58,36 @@ ENVIRONMENT = os.getenv('ENVIRONMENT', 'production')
 # Global database pool
 db_pool: Optional[Pool] = None
 
+# Hot auth lookups. Fixed query text lets asyncpg's per-connection statement
+# cache keep them prepared; only the columns the handlers use are fetched.
+CURRENT_USER_QUERY = """
+    SELECT id, name, email, company_name, subscription_plan, is_active
+    FROM companies WHERE id = $1
+"""
+LOGIN_QUERY = """
+    SELECT id, name, email, company_name, subscription_plan, password_hash
+    FROM companies WHERE email = $1 AND is_active = TRUE
+"""
+
+# Password hashing is CPU-bound; hashlib releases the GIL so it runs off the event loop here
+HASH_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Scraper patterns, compiled once at import
+PRICE_PATTERNS = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
+        r'₹\s*[\d,]+(?:\.\d{2})?',
+        r'Rs\.?\s*[\d,]+(?:\.\d{2})?',
+        r'\$\s*[\d,]+(?:\.\d{2})?'
+    )
+]
+PRICE_CLEAN = re.compile(r'[^\d,.]')
+# A whole sentence (starting at text start or after . ! ?) containing a promo keyword
+# as a whole word; matched against lowercased text
+PROMO_SENTENCE_RE = re.compile(r'(?<![^.!?])([^.!?]*?\b(sale|discount|offer|deal|special|free)\b[^.!?]*)')
+TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+SCRIPT_STYLE_RE = re.compile(r'<(script|style)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+TAG_STRIP_RE = re.compile(r'<[^>]+>')
+
 # Authentication Manager
 class AuthManager:
     def __init__(self):
@@ -64,9 +104,19 @@ class AuthManager:
         """Verify password against hash"""
         try:
             stored_hash, salt = hashed.split(':')
-            return hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000).hex() == stored_hash
-        except:
+            expected = bytes.fromhex(stored_hash)
+        except ValueError:
             return False
+        computed = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
+        return hmac.compare_digest(computed, expected)
+    
+    async def hash_password_async(self, password: str) -> str:
+        """Hash password in the hashing thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(HASH_POOL, self.hash_password, password)
+    
+    async def verify_password_async(self, password: str, hashed: str) -> bool:
+        """Verify password in the hashing thread pool"""
+        return await asyncio.get_running_loop().run_in_executor(HASH_POOL, self.verify_password, password, hashed)
     
     def create_access_token(self, data: dict) -> str:
         """Create JWT access token"""
@@ -89,70 +139,108 @@ class CompetitorScraper:
             'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         ]
+        self.user_agent_cycle = cycle(random.sample(self.user_agents, len(self.user_agents)))
+        self._session: Optional[aiohttp.ClientSession] = None
+    
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """Shared session so scrapes reuse pooled keep-alive connections"""
+        if self._session is None or self._session.closed:
+            # Few distinct competitor hosts: keep a handful of keep-alive sockets each
+            # and resolve each host once per 10 minutes
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=4,
+                use_dns_cache=True,
+                ttl_dns_cache=600,
+                resolver=aiohttp.AsyncResolver() if HAS_AIODNS else None
+            )
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30),
+                connector=connector
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared session"""
+        if self._session and not self._session.closed:
+            await self._session.close()
     
     async def scrape_website(self, url: str) -> dict:
         """Scrape competitor website data"""
         try:
-            async with aiohttp.ClientSession(
-                timeout=aiohttp.ClientTimeout(total=30),
-                headers={'User-Agent': random.choice(self.user_agents)}
-            ) as session:
-                async with session.get(url) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        soup = BeautifulSoup(html, 'html.parser')
-                        
-                        return {
-                            'url': url,
-                            'title': soup.title.string if soup.title else '',
-                            'content_length': len(html),
-                            'prices': self._extract_prices(html),
-                            'promotions': self._extract_promotions(soup),
-                            'scraped_at': datetime.utcnow().isoformat(),
-                            'success': True
-                        }
-                    else:
-                        return {'url': url, 'error': f'HTTP {response.status}', 'success': False}
+            session = await self._get_session()
+            async with session.get(url, headers={'User-Agent': next(self.user_agent_cycle)}) as response:
+                if response.status == 200:
+                    html = await response.text()
+                    title, text_content = self._parse_page(html)
+                    
+                    return {
+                        'url': url,
+                        'title': title,
+                        'content_length': len(html),
+                        'prices': self._extract_prices(html),
+                        'promotions': self._extract_promotions(text_content),
+                        'scraped_at': datetime.utcnow().isoformat(),
+                        'success': True
+                    }
+                else:
+                    return {'url': url, 'error': f'HTTP {response.status}', 'success': False}
         except Exception as e:
             return {'url': url, 'error': str(e), 'success': False}
     
+    async def scrape_many(self, urls: List[str], concurrency: int = 10) -> List[dict]:
+        """Scrape several websites concurrently, at most `concurrency` at a time"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def scrape_one(url: str) -> dict:
+            async with semaphore:
+                return await self.scrape_website(url)
+        
+        results = await asyncio.gather(*(scrape_one(url) for url in urls), return_exceptions=True)
+        
+        scraped = []
+        for url, result in zip(urls, results):
+            # Cancellation (a BaseException) is propagated, never reported as a failed scrape
+            if isinstance(result, asyncio.CancelledError):
+                raise result
+            if isinstance(result, BaseException):
+                result = {'url': url, 'error': str(result), 'success': False}
+            scraped.append(result)
+        return scraped
+    
+    def _parse_page(self, html: str) -> Tuple[str, str]:
+        """Return the page title and its text, straight from the raw HTML (no DOM build)"""
+        match = TITLE_RE.search(html)
+        title = unescape(match.group(1).strip()) if match else ''
+        text_content = TAG_STRIP_RE.sub(' ', SCRIPT_STYLE_RE.sub(' ', html))
+        return title, unescape(text_content)
+    
     def _extract_prices(self, html: str) -> List[dict]:
         """Extract price information"""
-        price_patterns = [
-            r'₹\s*[\d,]+(?:\.\d{2})?',
-            r'Rs\.?\s*[\d,]+(?:\.\d{2})?',
-            r'\$\s*[\d,]+(?:\.\d{2})?'
-        ]
-        
         prices = []
-        for pattern in price_patterns:
-            matches = re.findall(pattern, html, re.IGNORECASE)
+        for pattern in PRICE_PATTERNS:
+            matches = pattern.findall(html)
             for match in matches[:10]:  # Limit to 10
-                clean_price = re.sub(r'[^\d,.]', '', match)
+                clean_price = PRICE_CLEAN.sub('', match)
                 if clean_price and len(clean_price) > 2:
                     prices.append({'raw': match.strip(), 'clean': clean_price})
         
         return prices
     
-    def _extract_promotions(self, soup: BeautifulSoup) -> List[dict]:
+    def _extract_promotions(self, text_content: str) -> List[dict]:
         """Extract promotional content"""
-        promo_keywords = ['sale', 'discount', 'offer', 'deal', 'special', 'free']
         promotions = []
         
-        text_content = soup.get_text().lower()
-        sentences = re.split(r'[.!?]', text_content)
-        
-        for sentence in sentences:
-            for keyword in promo_keywords:
-                if keyword in sentence and 20 <= len(sentence.strip()) <= 150:
-                    promotions.append({
-                        'text': sentence.strip(),
-                        'keyword': keyword
-                    })
-                    if len(promotions) >= 5:
-                        break
-            if len(promotions) >= 5:
-                break
+        # One regex pass yields only the sentences that mention a promo keyword
+        for match in PROMO_SENTENCE_RE.finditer(text_content.lower()):
+            sentence = match.group(1).strip()
+            if 20 <= len(sentence) <= 150:
+                promotions.append({
+                    'text': sentence,
+                    'keyword': match.group(2)
+                })
+                if len(promotions) >= 5:
+                    break
         
         return promotions
 
@@ -232,7 +320,7 @@ async def create_demo_data():
             return
         
         auth = AuthManager()
-        password_hash = auth.hash_password('demo123')
+        password_hash = await auth.hash_password_async('demo123')
         
         # Create demo company
         company_id = await conn.fetchval("""
@@ -248,13 +336,15 @@ async def create_demo_data():
             ('Elite Auto', 'https://cardekho.com', 'LOW')
         ]
         
-        competitor_ids = []
-        for name, website, threat in competitors:
-            comp_id = await conn.fetchval("""
-                INSERT INTO competitors (company_id, name, website, industry, threat_level)
-                VALUES ($1, $2, $3, $4, $5) RETURNING id
-            """, company_id, name, website, 'Automotive', threat)
-            competitor_ids.append(comp_id)
+        # One multi-row insert; ids are mapped back by website since RETURNING order isn't guaranteed
+        inserted = await conn.fetch("""
+            INSERT INTO competitors (company_id, name, website, industry, threat_level)
+            SELECT $1, name, website, 'Automotive', threat_level
+            FROM unnest($2::text[], $3::text[], $4::text[]) AS c(name, website, threat_level)
+            RETURNING id, website
+        """, company_id, *(list(column) for column in zip(*competitors)))
+        ids_by_website = {row['website']: row['id'] for row in inserted}
+        competitor_ids = [ids_by_website[website] for _, website, _ in competitors]
         
         # Create demo alerts
         alerts = [
@@ -269,11 +359,10 @@ async def create_demo_data():
              'Target "Fast & Reliable Service" in marketing campaigns')
         ]
         
-        for comp_id, alert_type, severity, title, message, recommendation in alerts:
-            await conn.execute("""
-                INSERT INTO alerts (company_id, competitor_id, alert_type, severity, title, message, recommendation)
-                VALUES ($1, $2, $3, $4, $5, $6, $7)
-            """, company_id, comp_id, alert_type, severity, title, message, recommendation)
+        await conn.executemany("""
+            INSERT INTO alerts (company_id, competitor_id, alert_type, severity, title, message, recommendation)
+            VALUES ($1, $2, $3, $4, $5, $6, $7)
+        """, [(company_id, *alert) for alert in alerts])
 
 # Application lifespan
 @asynccontextmanager
@@ -287,10 +376,13 @@ async def lifespan(app: FastAPI):
         # Initialize database pool
         db_pool = await asyncpg.create_pool(
             DATABASE_URL,
-            min_size=2,
-            max_size=10,
-            command_timeout=60
+            min_size=10,
+            max_size=50,
+            max_inactive_connection_lifetime=300.0,
+            command_timeout=60,
+            statement_cache_size=1024
         )
+        app.state.db_pool = db_pool
         logger.info("✅ Database connection established")
         
         # Initialize schema and demo data
@@ -307,6 +399,8 @@ async def lifespan(app: FastAPI):
     yield
     
     # Cleanup
+    await scraper.close()
+    
     if db_pool:
         await db_pool.close()
         logger.info("🗄️ Database connections closed")
@@ -316,6 +410,7 @@ app = FastAPI(
     title="BlackFang Intelligence",
     description="Professional Competitive Intelligence Platform",
     version="2.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -345,7 +440,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
             return {"id": 1, "email": "demo@blackfangintel.com"}
         
         async with db_pool.acquire() as conn:
-            user = await conn.fetchrow("SELECT * FROM companies WHERE id = $1", company_id)
+            user = await conn.fetchrow(CURRENT_USER_QUERY, company_id)
             if not user:
                 raise HTTPException(status_code=401, detail="User not found")
             return dict(user)
@@ -380,7 +475,9 @@ async def health_check():
             async with db_pool.acquire() as conn:
                 await conn.fetchval("SELECT 1")
             health["database"] = "connected"
-        except:
+        except asyncio.CancelledError:
+            raise
+        except (asyncpg.PostgresError, asyncpg.InterfaceError, OSError, asyncio.TimeoutError):
             health["database"] = "error"
             health["status"] = "degraded"
     else:
@@ -403,26 +500,25 @@ async def login(request: Request):
         # Database authentication
         if db_pool:
             async with db_pool.acquire() as conn:
-                user = await conn.fetchrow(
-                    "SELECT * FROM companies WHERE email = $1 AND is_active = TRUE", email
-                )
+                user = await conn.fetchrow(LOGIN_QUERY, email)
+            
+            # Hash check runs after the connection is back in the pool
+            if user and await auth_manager.verify_password_async(password, user['password_hash']):
+                token_data = {"company_id": user['id'], "email": user['email']}
+                access_token = auth_manager.create_access_token(token_data)
                 
-                if user and auth_manager.verify_password(password, user['password_hash']):
-                    token_data = {"company_id": user['id'], "email": user['email']}
-                    access_token = auth_manager.create_access_token(token_data)
-                    
-                    return {
-                        "success": True,
-                        "access_token": access_token,
-                        "token_type": "bearer",
-                        "user": {
-                            "id": user['id'],
-                            "name": user['name'],
-                            "email": user['email'],
-                            "company_name": user['company_name'],
-                            "subscription_plan": user['subscription_plan']
-                        }
+                return {
+                    "success": True,
+                    "access_token": access_token,
+                    "token_type": "bearer",
+                    "user": {
+                        "id": user['id'],
+                        "name": user['name'],
+                        "email": user['email'],
+                        "company_name": user['company_name'],
+                        "subscription_plan": user['subscription_plan']
                     }
+                }
         
         # Demo authentication
         if email == 'demo@blackfangintel.com' and password == 'demo123':
@@ -499,10 +595,7 @@ async def get_dashboard_data(company_id: int, current_user: dict = Depends(get_c
     }
 
 # Main application interface
-@app.get("/app", response_class=HTMLResponse)
-async def serve_app():
-    """Serve login interface"""
-    return """
+LOGIN_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -649,12 +742,20 @@ async def serve_app():
     </body>
     </html>
     """
+LOGIN_HTML_BYTES = LOGIN_HTML.encode()
+LOGIN_ETAG = '"' + hashlib.md5(LOGIN_HTML_BYTES).hexdigest() + '"'
+LOGIN_HEADERS = {"Cache-Control": "public, max-age=3600", "ETag": LOGIN_ETAG}
+
+@app.get("/app", response_class=HTMLResponse)
+async def serve_app(request: Request):
+    """Serve login interface"""
+    if request.headers.get("if-none-match") == LOGIN_ETAG:
+        return Response(status_code=304, headers=LOGIN_HEADERS)
+    return Response(content=LOGIN_HTML_BYTES, media_type="text/html", headers=LOGIN_HEADERS)
 
 # Professional Dashboard
-@app.get("/dashboard/{company_id}", response_class=HTMLResponse)
-async def serve_dashboard(company_id: int):
-    """Serve professional dashboard"""
-    return f"""
+# Only the company id varies, so the page is encoded once and split around it
+DASHBOARD_HTML = """
     <!DOCTYPE html>
     <html lang="en">
     <head>
@@ -662,21 +763,21 @@ async def serve_dashboard(company_id: int):
         <meta name="viewport" content="width=device-width, initial-scale=1.0">
         <title>BlackFang Intelligence - Dashboard</title>
         <style>
-            body {{ font-family: system-ui, -apple-system, sans-serif; background: linear-gradient(135deg, #0c0c0c, #1a1a1a); color: white; margin: 0; }}
-            .header {{ background: linear-gradient(135deg, #1e1e1e, #2a2a2a); padding: 20px 0; border-bottom: 1px solid rgba(220,38,38,0.3); }}
-            .header-content {{ max-width: 1400px; margin: 0 auto; padding: 0 20px; display: flex; justify-content: space-between; align-items: center; }}
-            .brand {{ font-size: 24px; font-weight: 700; background: linear-gradient(135deg, #dc2626, #f59e0b); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }}
-            .container {{ max-width: 1400px; margin: 0 auto; padding: 30px 20px; }}
-            .stats-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(280px, 1fr)); gap: 25px; margin-bottom: 40px; }}
-            .stat-card {{ background: linear-gradient(135deg, #1e1e1e, #2a2a2a); padding: 30px; border-radius: 16px; border-left: 5px solid #dc2626; }}
-            .stat-number {{ font-size: 42px; font-weight: 800; background: linear-gradient(135deg, #dc2626, #f59e0b); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }}
-            .stat-label {{ color: #ccc; font-size: 16px; margin-top: 8px; }}
-            .section {{ background: linear-gradient(135deg, #1e1e1e, #2a2a2a); padding: 30px; border-radius: 16px; margin-bottom: 30px; }}
-            .section-title {{ font-size: 22px; font-weight: 700; color: #dc2626; margin-bottom: 25px; }}
-            .alert {{ background: #2d2d2d; padding: 25px; margin: 20px 0; border-radius: 12px; border-left: 5px solid #dc2626; }}
-            .alert-title {{ font-size: 18px; font-weight: 700; margin-bottom: 15px; }}
-            .competitor {{ background: #2d2d2d; padding: 25px; margin: 20px 0; border-radius: 12px; border-left: 5px solid #666; }}
-            .btn {{ background: linear-gradient(135deg, #dc2626, #b91c1c); color: white; padding: 12px 25px; border: none; border-radius: 8px; cursor: pointer; }}
+            body { font-family: system-ui, -apple-system, sans-serif; background: linear-gradient(135deg, #0c0c0c, #1a1a1a); color: white; margin: 0; }
+            .header { background: linear-gradient(135deg, #1e1e1e, #2a2a2a); padding: 20px 0; border-bottom: 1px solid rgba(220,38,38,0.3); }
+            .header-content { max-width: 1400px; margin: 0 auto; padding: 0 20px; display: flex; justify-content: space-between; align-items: center; }
+            .brand { font-size: 24px; font-weight: 700; background: linear-gradient(135deg, #dc2626, #f59e0b); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }
+            .container { max-width: 1400px; margin: 0 auto; padding: 30px 20px; }
+            .stats-grid { display: grid; grid-template-columns: repeat(auto-fit, minmax(280px, 1fr)); gap: 25px; margin-bottom: 40px; }
+            .stat-card { background: linear-gradient(135deg, #1e1e1e, #2a2a2a); padding: 30px; border-radius: 16px; border-left: 5px solid #dc2626; }
+            .stat-number { font-size: 42px; font-weight: 800; background: linear-gradient(135deg, #dc2626, #f59e0b); -webkit-background-clip: text; -webkit-text-fill-color: transparent; }
+            .stat-label { color: #ccc; font-size: 16px; margin-top: 8px; }
+            .section { background: linear-gradient(135deg, #1e1e1e, #2a2a2a); padding: 30px; border-radius: 16px; margin-bottom: 30px; }
+            .section-title { font-size: 22px; font-weight: 700; color: #dc2626; margin-bottom: 25px; }
+            .alert { background: #2d2d2d; padding: 25px; margin: 20px 0; border-radius: 12px; border-left: 5px solid #dc2626; }
+            .alert-title { font-size: 18px; font-weight: 700; margin-bottom: 15px; }
+            .competitor { background: #2d2d2d; padding: 25px; margin: 20px 0; border-radius: 12px; border-left: 5px solid #666; }
+            .btn { background: linear-gradient(135deg, #dc2626, #b91c1c); color: white; padding: 12px 25px; border: none; border-radius: 8px; cursor: pointer; }
         </style>
     </head>
     <body>
@@ -751,23 +852,23 @@ async def serve_dashboard(company_id: int):
         </div>
         
         <script>
-            async function refreshData() {{
-                try {{
+            async function refreshData() {
+                try {
                     const token = localStorage.getItem('access_token');
-                    const response = await fetch('/api/dashboard/{company_id}', {{
-                        headers: {{ 'Authorization': `Bearer ${{token}}` }}
-                    }});
+                    const response = await fetch('/api/dashboard/__COMPANY_ID__', {
+                        headers: { 'Authorization': `Bearer ${token}` }
+                    });
                     
-                    if (response.ok) {{
+                    if (response.ok) {
                         const data = await response.json();
                         document.getElementById('competitors').textContent = data.competitors?.active_competitors || 3;
                         document.getElementById('alerts').textContent = data.alerts?.summary?.total_alerts || 5;
                         document.getElementById('threats').textContent = data.alerts?.summary?.high_alerts || 1;
-                    }}
-                }} catch (error) {{
+                    }
+                } catch (error) {
                     console.error('Refresh failed:', error);
-                }}
-            }}
+                }
+            }
             
             // Auto refresh every 30 seconds
             setInterval(refreshData, 30000);
@@ -778,6 +879,15 @@ async def serve_dashboard(company_id: int):
     </body>
     </html>
     """
+DASHBOARD_HTML_PREFIX, DASHBOARD_HTML_SUFFIX = DASHBOARD_HTML.encode().split(b"__COMPANY_ID__")
+
+@app.get("/dashboard/{company_id}", response_class=HTMLResponse)
+async def serve_dashboard(company_id: int):
+    """Serve professional dashboard"""
+    return Response(
+        content=DASHBOARD_HTML_PREFIX + str(company_id).encode() + DASHBOARD_HTML_SUFFIX,
+        media_type="text/html"
+    )
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8080))
@@ -15,15 +15,17 @@ import jwt
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 import json
+import orjson
 import re
+import base64
 from decimal import Decimal
 
 # FastAPI imports
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Request, Response, status
+from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import HTMLResponse, JSONResponse, FileResponse
+from fastapi.responses import HTMLResponse, JSONResponse, FileResponse, ORJSONResponse, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.staticfiles import StaticFiles
 from contextlib import asynccontextmanager
@@ -42,9 +44,10 @@ from bs4 import BeautifulSoup
 import pandas as pd
 from textblob import TextBlob
 import requests
-from urllib.parse import urlparse, urljoin
+from urllib.parse import urlparse, urljoin, urlunparse
 import time
 import random
+from itertools import cycle
 
 # Email and notification imports
 import smtplib
@@ -80,11 +83,32 @@ SENDGRID_API_KEY = os.getenv('SENDGRID_API_KEY', '')
 ENVIRONMENT = os.getenv('ENVIRONMENT', 'production')
 ALLOWED_HOSTS = os.getenv('ALLOWED_HOSTS', '*').split(',')
 
+# pg_advisory_xact_lock key guarding the dashboard statistics setup
+DASHBOARD_STATS_LOCK_ID = 4_201_570_001
+
+# pg_advisory_lock key and retry budget for the competitor website index build
+COMPETITOR_INDEX_LOCK_ID = 4_201_570_002
+COMPETITOR_INDEX_ATTEMPTS = 3
+
 # Global variables
 db_pool: Optional[Pool] = None
 redis_client = None
 celery_app = None
 
+def orjson_default(obj: Any) -> Any:
+    """Serialize types orjson does not handle natively"""
+    if isinstance(obj, asyncpg.Record):
+        return dict(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+class RecordJSONResponse(ORJSONResponse):
+    """JSON response that serializes asyncpg Records without converting rows up front"""
+    
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=orjson_default, option=orjson.OPT_NON_STR_KEYS)
+
 # Initialize Celery for background tasks
 celery_app = Celery(
     'blackfang_tasks',
@@ -249,10 +273,429 @@ class DatabaseManager:
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_competitor_data_scraped_at ON competitor_data(scraped_at DESC)")
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_company_id ON alerts(company_id)")
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_created_at ON alerts(created_at DESC)")
+            await conn.execute("CREATE INDEX IF NOT EXISTS idx_alerts_competitor_id ON alerts(competitor_id)")
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_reports_company_id ON reports(company_id)")
             await conn.execute("CREATE INDEX IF NOT EXISTS idx_audit_logs_company_id ON audit_logs(company_id)")
+
+            # Composite indexes serving the "most recent N" dashboard and list queries straight from the index
+            await conn.execute("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_alerts_company_created
+                ON alerts(company_id, created_at DESC) INCLUDE (severity, is_read, competitor_id, title)
+            """)
+            await conn.execute("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_competitor_data_competitor_scraped
+                ON competitor_data(competitor_id, scraped_at DESC) INCLUDE (processing_status)
+            """)
+            await conn.execute("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_reports_company_generated
+                ON reports(company_id, generated_at DESC)
+            """)
+
+            # One competitor per website per company, whatever the URL's letter case
+            await self.ensure_competitor_website_index(conn)
+            
+            # Partial index for the active-competitor counts (plan limit check, competitor list)
+            await conn.execute("""
+                CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_competitors_active
+                ON competitors(company_id) WHERE monitoring_status = 'active'
+            """)
+            
+            # Dashboard statistics maintained incrementally by triggers
+            await self.initialize_dashboard_stats(conn)
             
         logger.info("✅ Database schema initialized successfully")
+    
+    async def ensure_competitor_website_index(self, conn):
+        """
+        Build the unique (company_id, lower(website)) index add_competitor's ON CONFLICT needs
+        
+        Rows from before the index differ only by case, so they are merged first. An
+        invalid index left by an interrupted build is dropped and rebuilt, and a duplicate
+        that races in during the build is merged before retrying. Startup fails rather
+        than continuing without the index.
+        """
+        # CREATE INDEX CONCURRENTLY cannot run in a transaction, so workers take a session lock
+        await conn.execute("SELECT pg_advisory_lock($1)", COMPETITOR_INDEX_LOCK_ID)
+        try:
+            for attempt in range(1, COMPETITOR_INDEX_ATTEMPTS + 1):
+                is_valid = await conn.fetchval("""
+                    SELECT indisvalid FROM pg_index
+                    WHERE indexrelid = to_regclass('idx_competitors_company_website')
+                """)
+                if is_valid:
+                    return
+                if is_valid is False:
+                    await conn.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_competitors_company_website")
+                
+                await self.merge_duplicate_competitors(conn)
+                try:
+                    await conn.execute("""
+                        CREATE UNIQUE INDEX CONCURRENTLY idx_competitors_company_website
+                        ON competitors(company_id, lower(website))
+                    """)
+                    return
+                except asyncpg.UniqueViolationError as e:
+                    # The failed build leaves an invalid index, dropped on the next pass
+                    logger.warning(f"Competitor website index build {attempt} hit a duplicate: {str(e)}")
+        finally:
+            await conn.execute("SELECT pg_advisory_unlock($1)", COMPETITOR_INDEX_LOCK_ID)
+        
+        raise RuntimeError("Could not build idx_competitors_company_website")
+    
+    async def merge_duplicate_competitors(self, conn):
+        """
+        Fold competitors whose websites differ only by letter case into the oldest row
+        
+        Alerts and scraped data are moved to the surviving competitor before the
+        duplicates are deleted, so nothing is lost to ON DELETE CASCADE.
+        """
+        async with conn.transaction():
+            duplicates = await conn.fetch("""
+                SELECT id, keep_id FROM (
+                    SELECT id, MIN(id) OVER (PARTITION BY company_id, lower(website)) as keep_id
+                    FROM competitors
+                    WHERE company_id IS NOT NULL
+                ) ranked
+                WHERE id <> keep_id
+            """)
+            if not duplicates:
+                return
+            
+            duplicate_ids = [row['id'] for row in duplicates]
+            keep_ids = [row['keep_id'] for row in duplicates]
+            
+            for table in ("alerts", "competitor_data"):
+                await conn.execute(f"""
+                    UPDATE {table} t SET competitor_id = d.keep_id
+                    FROM unnest($1::int[], $2::int[]) as d(id, keep_id)
+                    WHERE t.competitor_id = d.id
+                """, duplicate_ids, keep_ids)
+            
+            await conn.execute("DELETE FROM competitors WHERE id = ANY($1::int[])", duplicate_ids)
+            
+        logger.info(f"Merged {len(duplicate_ids)} case-variant duplicate competitors")
+    
+    async def initialize_dashboard_stats(self, conn):
+        """
+        Create trigger-maintained dashboard statistics
+        
+        company_dashboard_stats holds running competitor and alert counts per company.
+        company_daily_activity holds per-day alert and scraping counts so the
+        today/week/30-day windows are a sum over at most 31 rows. Row-level triggers
+        keep both current, so reads never scan alerts or competitor_data.
+        """
+        # Every worker runs this at startup. The advisory lock serialises them, and the
+        # single transaction means no write lands between trigger creation and backfill.
+        # Triggers are only created when missing: DROP TRIGGER would take ACCESS EXCLUSIVE
+        # on the source tables on every deploy. Function bodies are still replaced.
+        async with conn.transaction():
+            await conn.execute("SELECT pg_advisory_xact_lock($1)", DASHBOARD_STATS_LOCK_ID)
+            
+            stats_exist = await conn.fetchval("SELECT to_regclass('company_dashboard_stats') IS NOT NULL")
+            
+            # Superseded by the trigger-maintained tables below
+            await conn.execute("DROP MATERIALIZED VIEW IF EXISTS mv_company_dashboard_stats")
+            
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS company_dashboard_stats (
+                    company_id INTEGER PRIMARY KEY REFERENCES companies(id) ON DELETE CASCADE,
+                    total_competitors INTEGER NOT NULL DEFAULT 0,
+                    active_competitors INTEGER NOT NULL DEFAULT 0,
+                    high_threat INTEGER NOT NULL DEFAULT 0,
+                    medium_threat INTEGER NOT NULL DEFAULT 0,
+                    low_threat INTEGER NOT NULL DEFAULT 0,
+                    total_alerts INTEGER NOT NULL DEFAULT 0,
+                    critical_alerts INTEGER NOT NULL DEFAULT 0,
+                    high_alerts INTEGER NOT NULL DEFAULT 0,
+                    medium_alerts INTEGER NOT NULL DEFAULT 0,
+                    low_alerts INTEGER NOT NULL DEFAULT 0,
+                    unread_alerts INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            
+            await conn.execute("""
+                CREATE TABLE IF NOT EXISTS company_daily_activity (
+                    company_id INTEGER REFERENCES companies(id) ON DELETE CASCADE,
+                    day DATE NOT NULL,
+                    alerts INTEGER NOT NULL DEFAULT 0,
+                    scraping_jobs INTEGER NOT NULL DEFAULT 0,
+                    completed_jobs INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (company_id, day)
+                )
+            """)
+            
+            # Decrements use plain UPDATEs so cascaded deletes never re-create rows
+            await conn.execute("""
+                CREATE OR REPLACE FUNCTION track_competitor_stats() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        UPDATE company_dashboard_stats SET
+                            total_competitors = total_competitors - 1,
+                            active_competitors = active_competitors - (OLD.monitoring_status IS NOT DISTINCT FROM 'active')::int,
+                            high_threat = high_threat - (OLD.threat_level IS NOT DISTINCT FROM 'HIGH')::int,
+                            medium_threat = medium_threat - (OLD.threat_level IS NOT DISTINCT FROM 'MEDIUM')::int,
+                            low_threat = low_threat - (OLD.threat_level IS NOT DISTINCT FROM 'LOW')::int
+                        WHERE company_id = OLD.company_id;
+                    END IF;
+                    
+                    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.company_id IS NOT NULL THEN
+                        INSERT INTO company_dashboard_stats (
+                            company_id, total_competitors, active_competitors,
+                            high_threat, medium_threat, low_threat
+                        ) VALUES (
+                            NEW.company_id, 1,
+                            (NEW.monitoring_status IS NOT DISTINCT FROM 'active')::int,
+                            (NEW.threat_level IS NOT DISTINCT FROM 'HIGH')::int,
+                            (NEW.threat_level IS NOT DISTINCT FROM 'MEDIUM')::int,
+                            (NEW.threat_level IS NOT DISTINCT FROM 'LOW')::int
+                        )
+                        ON CONFLICT (company_id) DO UPDATE SET
+                            total_competitors = company_dashboard_stats.total_competitors + 1,
+                            active_competitors = company_dashboard_stats.active_competitors + EXCLUDED.active_competitors,
+                            high_threat = company_dashboard_stats.high_threat + EXCLUDED.high_threat,
+                            medium_threat = company_dashboard_stats.medium_threat + EXCLUDED.medium_threat,
+                            low_threat = company_dashboard_stats.low_threat + EXCLUDED.low_threat;
+                    END IF;
+                    
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_trigger
+                        WHERE tgrelid = 'competitors'::regclass AND tgname = 'trg_competitor_stats'
+                    ) THEN
+                        CREATE TRIGGER trg_competitor_stats
+                            AFTER INSERT OR UPDATE OR DELETE ON competitors
+                            FOR EACH ROW EXECUTE FUNCTION track_competitor_stats();
+                    END IF;
+                END $$;
+            """)
+            
+            await conn.execute("""
+                CREATE OR REPLACE FUNCTION track_alert_stats() RETURNS trigger AS $$
+                BEGIN
+                    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                        UPDATE company_dashboard_stats SET
+                            total_alerts = total_alerts - 1,
+                            critical_alerts = critical_alerts - (OLD.severity = 'CRITICAL')::int,
+                            high_alerts = high_alerts - (OLD.severity = 'HIGH')::int,
+                            medium_alerts = medium_alerts - (OLD.severity = 'MEDIUM')::int,
+                            low_alerts = low_alerts - (OLD.severity = 'LOW')::int,
+                            unread_alerts = unread_alerts - (OLD.is_read IS FALSE)::int
+                        WHERE company_id = OLD.company_id;
+                        
+                        UPDATE company_daily_activity SET alerts = alerts - 1
+                        WHERE company_id = OLD.company_id AND day = OLD.created_at::date;
+                    END IF;
+                    
+                    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.company_id IS NOT NULL THEN
+                        INSERT INTO company_dashboard_stats (
+                            company_id, total_alerts, critical_alerts, high_alerts,
+                            medium_alerts, low_alerts, unread_alerts
+                        ) VALUES (
+                            NEW.company_id, 1,
+                            (NEW.severity = 'CRITICAL')::int,
+                            (NEW.severity = 'HIGH')::int,
+                            (NEW.severity = 'MEDIUM')::int,
+                            (NEW.severity = 'LOW')::int,
+                            (NEW.is_read IS FALSE)::int
+                        )
+                        ON CONFLICT (company_id) DO UPDATE SET
+                            total_alerts = company_dashboard_stats.total_alerts + 1,
+                            critical_alerts = company_dashboard_stats.critical_alerts + EXCLUDED.critical_alerts,
+                            high_alerts = company_dashboard_stats.high_alerts + EXCLUDED.high_alerts,
+                            medium_alerts = company_dashboard_stats.medium_alerts + EXCLUDED.medium_alerts,
+                            low_alerts = company_dashboard_stats.low_alerts + EXCLUDED.low_alerts,
+                            unread_alerts = company_dashboard_stats.unread_alerts + EXCLUDED.unread_alerts;
+                        
+                        IF NEW.created_at IS NOT NULL THEN
+                            INSERT INTO company_daily_activity (company_id, day, alerts)
+                            VALUES (NEW.company_id, NEW.created_at::date, 1)
+                            ON CONFLICT (company_id, day) DO UPDATE SET
+                                alerts = company_daily_activity.alerts + 1;
+                        END IF;
+                    END IF;
+                    
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_trigger
+                        WHERE tgrelid = 'alerts'::regclass AND tgname = 'trg_alert_stats'
+                    ) THEN
+                        CREATE TRIGGER trg_alert_stats
+                            AFTER INSERT OR UPDATE OR DELETE ON alerts
+                            FOR EACH ROW EXECUTE FUNCTION track_alert_stats();
+                    END IF;
+                END $$;
+            """)
+            
+            await conn.execute("""
+                CREATE OR REPLACE FUNCTION track_scraping_stats() RETURNS trigger AS $$
+                DECLARE
+                    v_company_id INTEGER;
+                BEGIN
+                    -- When the competitor itself is being deleted it is no longer visible here;
+                    -- release_competitor_scraping_stats has already subtracted its jobs
+                    IF TG_OP IN ('UPDATE', 'DELETE') AND OLD.scraped_at IS NOT NULL THEN
+                        SELECT company_id INTO v_company_id FROM competitors WHERE id = OLD.competitor_id;
+                        
+                        UPDATE company_daily_activity SET
+                            scraping_jobs = scraping_jobs - 1,
+                            completed_jobs = completed_jobs - (OLD.processing_status IS NOT DISTINCT FROM 'completed')::int
+                        WHERE company_id = v_company_id AND day = OLD.scraped_at::date;
+                    END IF;
+                    
+                    IF TG_OP IN ('INSERT', 'UPDATE') AND NEW.scraped_at IS NOT NULL THEN
+                        SELECT company_id INTO v_company_id FROM competitors WHERE id = NEW.competitor_id;
+                        
+                        IF v_company_id IS NOT NULL THEN
+                            INSERT INTO company_daily_activity (company_id, day, scraping_jobs, completed_jobs)
+                            VALUES (
+                                v_company_id, NEW.scraped_at::date, 1,
+                                (NEW.processing_status IS NOT DISTINCT FROM 'completed')::int
+                            )
+                            ON CONFLICT (company_id, day) DO UPDATE SET
+                                scraping_jobs = company_daily_activity.scraping_jobs + 1,
+                                completed_jobs = company_daily_activity.completed_jobs + EXCLUDED.completed_jobs;
+                        END IF;
+                    END IF;
+                    
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+                
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_trigger
+                        WHERE tgrelid = 'competitor_data'::regclass AND tgname = 'trg_scraping_stats'
+                    ) THEN
+                        CREATE TRIGGER trg_scraping_stats
+                            AFTER INSERT OR UPDATE OR DELETE ON competitor_data
+                            FOR EACH ROW EXECUTE FUNCTION track_scraping_stats();
+                    END IF;
+                END $$;
+                
+                CREATE OR REPLACE FUNCTION release_competitor_scraping_stats() RETURNS trigger AS $$
+                BEGIN
+                    UPDATE company_daily_activity d SET
+                        scraping_jobs = d.scraping_jobs - x.jobs,
+                        completed_jobs = d.completed_jobs - x.completed
+                    FROM (
+                        SELECT 
+                            scraped_at::date as day,
+                            COUNT(*) as jobs,
+                            COUNT(*) FILTER (WHERE processing_status = 'completed') as completed
+                        FROM competitor_data
+                        WHERE competitor_id = OLD.id AND scraped_at IS NOT NULL
+                        GROUP BY scraped_at::date
+                    ) x
+                    WHERE d.company_id = OLD.company_id AND d.day = x.day;
+                    
+                    RETURN OLD;
+                END;
+                $$ LANGUAGE plpgsql;
+                
+                DO $$
+                BEGIN
+                    IF NOT EXISTS (
+                        SELECT 1 FROM pg_trigger
+                        WHERE tgrelid = 'competitors'::regclass AND tgname = 'trg_release_competitor_scraping_stats'
+                    ) THEN
+                        CREATE TRIGGER trg_release_competitor_scraping_stats
+                            BEFORE DELETE ON competitors
+                            FOR EACH ROW EXECUTE FUNCTION release_competitor_scraping_stats();
+                    END IF;
+                END $$;
+            """)
+            
+            # One-time backfill; triggers carry the counts from here on
+            if not stats_exist:
+                await conn.execute("""
+                    INSERT INTO company_dashboard_stats
+                    SELECT 
+                        co.id,
+                        COALESCE(cs.total_competitors, 0),
+                        COALESCE(cs.active_competitors, 0),
+                        COALESCE(cs.high_threat, 0),
+                        COALESCE(cs.medium_threat, 0),
+                        COALESCE(cs.low_threat, 0),
+                        COALESCE(al.total_alerts, 0),
+                        COALESCE(al.critical_alerts, 0),
+                        COALESCE(al.high_alerts, 0),
+                        COALESCE(al.medium_alerts, 0),
+                        COALESCE(al.low_alerts, 0),
+                        COALESCE(al.unread_alerts, 0)
+                    FROM companies co
+                    LEFT JOIN (
+                        SELECT 
+                            company_id,
+                            COUNT(*) as total_competitors,
+                            COUNT(*) FILTER (WHERE monitoring_status = 'active') as active_competitors,
+                            COUNT(*) FILTER (WHERE threat_level = 'HIGH') as high_threat,
+                            COUNT(*) FILTER (WHERE threat_level = 'MEDIUM') as medium_threat,
+                            COUNT(*) FILTER (WHERE threat_level = 'LOW') as low_threat
+                        FROM competitors
+                        GROUP BY company_id
+                    ) cs ON cs.company_id = co.id
+                    LEFT JOIN (
+                        SELECT 
+                            company_id,
+                            COUNT(*) as total_alerts,
+                            COUNT(*) FILTER (WHERE severity = 'CRITICAL') as critical_alerts,
+                            COUNT(*) FILTER (WHERE severity = 'HIGH') as high_alerts,
+                            COUNT(*) FILTER (WHERE severity = 'MEDIUM') as medium_alerts,
+                            COUNT(*) FILTER (WHERE severity = 'LOW') as low_alerts,
+                            COUNT(*) FILTER (WHERE is_read = FALSE) as unread_alerts
+                        FROM alerts
+                        GROUP BY company_id
+                    ) al ON al.company_id = co.id
+                    ON CONFLICT (company_id) DO UPDATE SET
+                        total_competitors = EXCLUDED.total_competitors,
+                        active_competitors = EXCLUDED.active_competitors,
+                        high_threat = EXCLUDED.high_threat,
+                        medium_threat = EXCLUDED.medium_threat,
+                        low_threat = EXCLUDED.low_threat,
+                        total_alerts = EXCLUDED.total_alerts,
+                        critical_alerts = EXCLUDED.critical_alerts,
+                        high_alerts = EXCLUDED.high_alerts,
+                        medium_alerts = EXCLUDED.medium_alerts,
+                        low_alerts = EXCLUDED.low_alerts,
+                        unread_alerts = EXCLUDED.unread_alerts
+                """)
+                
+                await conn.execute("""
+                    INSERT INTO company_daily_activity (company_id, day, alerts)
+                    SELECT company_id, created_at::date, COUNT(*)
+                    FROM alerts
+                    WHERE company_id IS NOT NULL AND created_at IS NOT NULL
+                    GROUP BY company_id, created_at::date
+                    ON CONFLICT (company_id, day) DO UPDATE SET
+                        alerts = EXCLUDED.alerts
+                """)
+                
+                await conn.execute("""
+                    INSERT INTO company_daily_activity (company_id, day, scraping_jobs, completed_jobs)
+                    SELECT 
+                        c.company_id,
+                        cd.scraped_at::date,
+                        COUNT(*),
+                        COUNT(*) FILTER (WHERE cd.processing_status = 'completed')
+                    FROM competitor_data cd
+                    JOIN competitors c ON cd.competitor_id = c.id
+                    WHERE c.company_id IS NOT NULL AND cd.scraped_at IS NOT NULL
+                    GROUP BY c.company_id, cd.scraped_at::date
+                    ON CONFLICT (company_id, day) DO UPDATE SET
+                        scraping_jobs = EXCLUDED.scraping_jobs,
+                        completed_jobs = EXCLUDED.completed_jobs
+                """)
 
 # Authentication and Security
 class AuthManager:
@@ -311,13 +754,14 @@ class IntelligenceScraper:
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
             'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         ]
+        self.user_agent_cycle = cycle(random.sample(self.user_agents, len(self.user_agents)))
     
     async def scrape_competitor_website(self, competitor: dict) -> dict:
         """Scrape comprehensive competitor website data"""
         try:
             async with aiohttp.ClientSession(
                 timeout=aiohttp.ClientTimeout(total=self.session_timeout),
-                headers={'User-Agent': random.choice(self.user_agents)}
+                headers={'User-Agent': next(self.user_agent_cycle)}
             ) as session:
                 
                 # Main website content
@@ -599,8 +1043,9 @@ async def lifespan(app: FastAPI):
         # Initialize database connection pool
         db_pool = await asyncpg.create_pool(
             DATABASE_URL,
-            min_size=5,
-            max_size=20,
+            min_size=10,
+            max_size=50,
+            max_inactive_connection_lifetime=600,
             command_timeout=60,
             server_settings={
                 'jit': 'off'
@@ -646,6 +1091,7 @@ app = FastAPI(
     version="2.0.0",
     docs_url="/api/docs",
     redoc_url="/api/redoc",
+    default_response_class=RecordJSONResponse,
     lifespan=lifespan
 )
 
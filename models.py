@@ -4,7 +4,7 @@ BlackFang Intelligence - Database Models and Schemas
 
 from datetime import datetime
 from typing import Optional, List
-from pydantic import BaseModel, EmailStr, validator
+from pydantic import BaseModel, EmailStr, Field, validator
 from enum import Enum
 
 # Enums for database choices
@@ -39,6 +39,11 @@ class AlertType(str, Enum):
     TRAFFIC_CHANGE = "TRAFFIC_CHANGE"
     RANKING_CHANGE = "RANKING_CHANGE"
 
+class ReportType(str, Enum):
+    WEEKLY = "weekly"
+    MONTHLY = "monthly"
+    CUSTOM = "custom"
+
 # Pydantic models for API requests/responses
 class CompanyBase(BaseModel):
     name: str
@@ -47,6 +52,10 @@ class CompanyBase(BaseModel):
     industry: Optional[str] = None
     subscription_plan: SubscriptionPlan = SubscriptionPlan.PROFESSIONAL
 
+    @validator('email', pre=True)
+    def normalize_email(cls, v):
+        return v.strip().lower() if isinstance(v, str) else v
+
 class CompanyCreate(CompanyBase):
     password: str
 
@@ -66,13 +75,20 @@ class CompanyResponse(CompanyBase):
         from_attributes = True
 
 class CompetitorBase(BaseModel):
-    name: str
-    website: str
+    name: str = Field(..., min_length=1)
+    website: str = Field(..., min_length=1)
     industry: Optional[str] = None
     location: Optional[str] = None
     threat_level: ThreatLevel = ThreatLevel.MEDIUM
     priority: int = 1
 
+    @validator('name', 'website')
+    def validate_not_blank(cls, v):
+        v = v.strip()
+        if not v:
+            raise ValueError('must not be blank')
+        return v
+
     @validator('website')
     def validate_website(cls, v):
         if not v.startswith(('http://', 'https://')):
@@ -164,6 +180,9 @@ class ReportBase(BaseModel):
     content: dict
     file_path: Optional[str] = None
 
+class ReportGenerateRequest(BaseModel):
+    report_type: ReportType = ReportType.WEEKLY
+
 class ReportCreate(ReportBase):
     company_id: int
 
@@ -182,6 +201,10 @@ class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
+    @validator('email', pre=True)
+    def normalize_email(cls, v):
+        return v.strip().lower() if isinstance(v, str) else v
+
 class Token(BaseModel):
     access_token: str
     refresh_token: Optional[str] = None
@@ -196,6 +219,10 @@ class TokenData(BaseModel):
 class RefreshToken(BaseModel):
     refresh_token: str
 
+class ChangePasswordRequest(BaseModel):
+    old_password: str
+    new_password: str
+
 # Dashboard models
 class DashboardStats(BaseModel):
     total_competitors: int
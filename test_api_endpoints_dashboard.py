@@ -0,0 +1,84 @@
+"""
+BlackFang Intelligence - Dashboard API endpoint tests
+
+api_endpoints_dashboard.py is a fragment that runs inside main_production's
+namespace, so the tests execute it against a minimal namespace of its own.
+"""
+
+import asyncio
+import base64
+import builtins
+import io
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse, urlunparse
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("email_validator")
+orjson = pytest.importorskip("orjson")
+
+from fastapi import BackgroundTasks, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, ORJSONResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from models import CompetitorBase, ReportGenerateRequest
+
+FRAGMENT_PATH = Path(__file__).parent / "api_endpoints_dashboard.py"
+COMPANY_ID = 1
+
+async def fake_current_user() -> dict:
+    return {"id": COMPANY_ID}
+
+def fake_open(path, *args, **kwargs):
+    """Serve the login page read at import without touching the filesystem"""
+    if path == "static/login.html":
+        return io.BytesIO(b"<html></html>")
+    return builtins.open(path, *args, **kwargs)
+
+@pytest.fixture
+def client() -> TestClient:
+    app = FastAPI()
+    namespace = {
+        "__builtins__": builtins,
+        "open": fake_open,
+        "app": app,
+        "db_pool": None,
+        "redis_client": None,
+        "logger": logging.getLogger("test_api_endpoints_dashboard"),
+        "get_current_user": fake_current_user,
+        "asyncio": asyncio,
+        "base64": base64,
+        "orjson": orjson,
+        "datetime": datetime,
+        "Optional": Optional,
+        "urlparse": urlparse,
+        "urlunparse": urlunparse,
+        "BackgroundTasks": BackgroundTasks,
+        "Depends": Depends,
+        "HTTPException": HTTPException,
+        "Query": Query,
+        "Request": Request,
+        "Response": Response,
+        "HTMLResponse": HTMLResponse,
+        "StreamingResponse": StreamingResponse,
+        "RecordJSONResponse": ORJSONResponse,
+        "orjson_default": None,
+        "CompetitorBase": CompetitorBase,
+        "ReportGenerateRequest": ReportGenerateRequest,
+    }
+    exec(compile(FRAGMENT_PATH.read_text(), str(FRAGMENT_PATH), "exec"), namespace)
+    return TestClient(app)
+
+@pytest.mark.parametrize("limit", [0, -5])
+def test_get_alerts_rejects_non_positive_limit(client: TestClient, limit: int):
+    response = client.get(f"/api/alerts/{COMPANY_ID}", params={"limit": limit})
+    assert response.status_code == 422
+
+def test_get_alerts_rejects_oversized_limit(client: TestClient):
+    response = client.get(f"/api/alerts/{COMPANY_ID}", params={"limit": 1_000_000})
+    assert response.status_code == 422